@@ -0,0 +1,275 @@
+# !/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Calculation of many expressions without the window of the calculator.
+
+The expressions are read one per line from a file or stdin and are
+calculated with the same engine as the calculator. The results are written as CSV or JSON lines:
+
+    python batch.py expressions.txt -o results.csv
+    cat expressions.txt | python batch.py --format jsonl --jobs 4
+
+With --jobs N the lines are sent in chunks to N processes, the order of the results is kept.
+A line which is calculated longer than --timeout seconds (2 by default, as in the calculator)
+gets the timeout error, its process is restarted and goes on with the next line.
+--mode selects the arithmetic: float (default), decimal or fraction (see modules/arithmetic.py).
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+
+from collections import deque
+from functools import partial
+from itertools import islice
+
+from modules.arithmetic import make_arithmetic, MODES, FLOAT
+from modules.engine import ExpressionError
+from modules.worker import calculate_text, set_memory_limit
+
+# error codes in the output
+OK = ''
+SYNTAX_ERROR = 'syntax'
+ZERO_DIVISION = 'zero_division'
+MATH_ERROR = 'math'
+MEMORY_ERROR = 'memory'
+TIMEOUT = 'timeout'
+PROCESS_ERROR = 'process'  # the process died, for example it was killed by the system
+
+DEFAULT_TIMEOUT = 2.0  # seconds per line, the same as the calculator waits
+CHECK_INTERVAL = 0.05  # seconds between the checks of a line which is being calculated
+
+FIELDS = ('line', 'expression', 'result', 'error')
+
+
+def evaluate_line(expression, arithmetic=FLOAT):
+    """(result, error code) of one expression"""
+    try:
+        return calculate_text(expression, arithmetic=arithmetic), OK
+    except ZeroDivisionError:
+        return '', ZERO_DIVISION
+    except ExpressionError:
+        return '', SYNTAX_ERROR
+    except MemoryError:
+        return '', MEMORY_ERROR
+    except (ArithmeticError, ValueError):
+        return '', MATH_ERROR
+
+
+def evaluate_chunk(chunk, arithmetic=FLOAT):
+    """chunk is a list of (line number, expression)"""
+    return [(number, expression, *evaluate_line(expression, arithmetic)) for number, expression in chunk]
+
+
+def serve_chunks(connection, current, arithmetic=FLOAT, memory_limit=None):
+    """the main loop of a process of TimedPool: receives a chunk and sends back its rows,
+    current.value is the index of the line being calculated"""
+    if memory_limit:
+        set_memory_limit(memory_limit)
+    while True:
+        try:
+            chunk = connection.recv()
+        except (EOFError, OSError):
+            break
+        rows = []
+        for index, (number, expression) in enumerate(chunk):
+            current.value = index
+            rows.append((number, expression, *evaluate_line(expression, arithmetic)))
+        connection.send(rows)
+
+
+class TimedWorker:
+    """a process which calculates chunks, every line has at most timeout seconds"""
+
+    def __init__(self, arithmetic, memory_limit, timeout):
+        self.arithmetic = arithmetic
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+        self.current = multiprocessing.RawValue('q', 0)  # the line is read without a pipe message per line
+        self.chunk = []
+        self.start_process()
+
+    def start_process(self):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve_chunks, daemon=True,
+                                               args=(child_connection, self.current, self.arithmetic,
+                                                     self.memory_limit))
+        self.process.start()
+        child_connection.close()
+
+    def stop_process(self):
+        self.connection.close()
+        self.process.terminate()
+        self.process.join()
+
+    def submit(self, chunk):
+        self.chunk = chunk
+        self.current.value = 0
+        self.connection.send(chunk)
+
+    def receive(self):
+        """(rows, None) or (None, error of the line being calculated)"""
+        # the time of a line is counted from the start of the wait, so it gets at least timeout seconds
+        index = -1
+        changed = time.monotonic()
+        while not self.connection.poll(CHECK_INTERVAL):
+            if self.current.value != index:
+                index = self.current.value
+                changed = time.monotonic()
+            elif time.monotonic() - changed > self.timeout:
+                return None, TIMEOUT
+        try:
+            return self.connection.recv(), None
+        except (EOFError, OSError):
+            return None, PROCESS_ERROR
+
+    def rows(self):
+        """the rows of the submitted chunk, the process is restarted after a line which did not end in time"""
+        rows = []
+        chunk = self.chunk
+        while True:
+            received, error = self.receive()
+            if error is None:
+                return rows + received
+            index = self.current.value
+            self.stop_process()
+            self.start_process()
+            if index > 0:
+                # the rows of the lines before were lost with the process
+                self.submit(chunk[:index])
+                rows += self.rows()
+            number, expression = chunk[index]
+            rows.append((number, expression, '', error))
+            chunk = chunk[index + 1:]
+            if not chunk:
+                return rows
+            self.submit(chunk)
+
+
+class TimedPool:
+    """like multiprocessing.Pool.imap for the chunks, but a line which hangs does not stop the work"""
+
+    def __init__(self, jobs, arithmetic=FLOAT, memory_limit=None, timeout=DEFAULT_TIMEOUT):
+        self.workers = [TimedWorker(arithmetic, memory_limit, timeout) for _ in range(max(jobs, 1))]
+
+    def imap(self, chunks):
+        """the rows of the chunks in their order, every process has one chunk at a time"""
+        busy = deque()
+        free = deque(self.workers)
+        for chunk in chunks:
+            if not free:
+                worker = busy.popleft()
+                yield worker.rows()
+                free.append(worker)
+            worker = free.popleft()
+            worker.submit(chunk)
+            busy.append(worker)
+        while busy:
+            yield busy.popleft().rows()
+
+    def terminate(self):
+        for worker in self.workers:
+            worker.stop_process()
+
+
+def read_chunks(file, chunk_size):
+    """yields lists of (line number, expression), the empty lines are skipped"""
+    lines = ((number, line.strip()) for number, line in enumerate(file, 1))
+    lines = ((number, line) for number, line in lines if line)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+class CsvWriter:
+    def __init__(self, file):
+        self.writer = csv.writer(file)
+        self.writer.writerow(FIELDS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+
+class JsonLinesWriter:
+    def __init__(self, file):
+        self.file = file
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n' for row in rows)
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonLinesWriter}
+
+
+def run(input_file, output_file, output_format='csv', jobs=1, chunk_size=1000, memory_limit=None,
+        arithmetic=FLOAT, timeout=DEFAULT_TIMEOUT):
+    """calculates all the expressions of input_file, returns (number of expressions, number of errors)
+
+    Without timeout (None or 0) a line may be calculated for ever, but with one process
+    the lines are calculated in this process, without sending them through a pipe."""
+    writer = WRITERS[output_format](output_file)
+    chunks = read_chunks(input_file, chunk_size)
+    evaluate = partial(evaluate_chunk, arithmetic=arithmetic)
+    total = errors = 0
+
+    if timeout:
+        pool = TimedPool(jobs, arithmetic, memory_limit, timeout)
+        results = pool.imap(chunks)
+    elif jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=set_memory_limit if memory_limit else None,
+                                    initargs=(memory_limit,) if memory_limit else ())
+        results = pool.imap(evaluate, chunks)
+    else:
+        pool = None
+        if memory_limit:
+            set_memory_limit(memory_limit)
+        results = map(evaluate, chunks)
+
+    try:
+        for rows in results:
+            writer.write_rows(rows)
+            total += len(rows)
+            errors += sum(1 for row in rows if row[3])
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return total, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Calculates the expressions of the calculator, one per line.')
+    parser.add_argument('input', nargs='?', default='-', help='file with expressions, stdin by default')
+    parser.add_argument('-o', '--output', default='-', help='file for results, stdout by default')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='csv', help='format of the results')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='number of lines sent to a process at once')
+    parser.add_argument('--memory-limit', type=int, default=None, help='memory limit of a process in MB')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='seconds for one line, 0 is no limit')
+    parser.add_argument('-m', '--mode', choices=MODES, default='float', help='arithmetic of the calculation')
+    parser.add_argument('--precision', type=int, default=28, help='significant digits of the decimal mode')
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    memory_limit = args.memory_limit * 2 ** 20 if args.memory_limit else None
+    try:
+        total, errors = run(input_file, output_file, args.format, args.jobs, args.chunk_size, memory_limit,
+                            make_arithmetic(args.mode, args.precision), args.timeout)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f'{total} expressions, {errors} errors', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# !/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of the calculator.
+
+    python benchmark.py engine
+
+Each benchmark prints the average time of one operation in microseconds.
+"""
+
+import argparse
+import os
+import random
+import time
+import timeit
+
+from math import sqrt
+
+from batch import evaluate_chunk
+from modules.arithmetic import make_arithmetic, MODES
+from modules.engine import calculate, compile_expression, evaluate, EvaluationCache
+
+
+SHORT_EXPRESSIONS = ('2+3x4', '7div2+5mod3', '√(16)²÷4', '1.5x(2-0.25)^2')
+
+
+def nested_expression(depth):
+    """'(1+(1+(1+...)))' with the specified depth of parenthesis"""
+    return '(1+' * depth + '1' + ')' * depth
+
+
+def legacy_eval(expression):
+    """the way the calculator evaluated expressions before the engine"""
+    expression = expression.replace('x', '*')
+    expression = expression.replace('÷', '/')
+    expression = expression.replace('div', '//')
+    expression = expression.replace('mod', '%')
+    expression = expression.replace('²', '**2')
+    expression = expression.replace('^', '**')
+    expression = expression.replace('√', 'sqrt')
+    return eval(expression, {'sqrt': sqrt})
+
+
+def measure(function, argument, number):
+    """average time of one call in microseconds"""
+    seconds = min(timeit.repeat(lambda: function(argument), number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def print_row(name, *columns):
+    print(f'{name:<40}' + ''.join(f'{column:>18}' for column in columns))
+
+
+def bench_engine(number):
+    """per-evaluation latency of eval() against the engine"""
+    expressions = list(SHORT_EXPRESSIONS) + [nested_expression(depth) for depth in (10, 50, 90)]
+    print_row('expression', 'eval, µs', 'engine, µs', 'compiled, µs')
+    for expression in expressions:
+        code = compile_expression(expression)
+        name = expression if len(expression) <= 40 else f'nested, {expression.count("(")} levels'
+        print_row(name,
+                  f'{measure(legacy_eval, expression, number):.2f}',
+                  f'{measure(calculate, expression, number):.2f}',
+                  f'{measure(evaluate, code, number):.2f}')
+
+
+def bench_cache(number):
+    """recalculation of a long expression after its tail is edited, without and with the cache"""
+    head = 'x'.join(f'(7^{50000 + i}mod13+√({i}))' for i in range(20))
+    edits = [f'{head}+{i}' for i in range(number)]
+
+    def recalculate(cache):
+        for expression in edits:
+            calculate(expression, cache)
+
+    cache = EvaluationCache()
+    print_row('', 'no cache, µs', 'cache, µs')
+    print_row('edit the tail of a 20-term expression',
+              f'{measure(recalculate, None, 1) / number:.2f}',
+              f'{measure(recalculate, cache, 1) / number:.2f}')
+    print(f'cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} entries')
+
+
+def batch_workload(size, integers=False, seed=0):
+    """random lines like the ones checked with batch.py"""
+    generator = random.Random(seed)
+    operators = ('+', '-', 'x', 'div', 'mod') if integers else ('+', '-', 'x', '÷', 'div', 'mod')
+    lines = []
+    for number in range(size):
+        if integers:
+            expression = (f'{generator.randint(1, 99999)}{generator.choice(operators)}{generator.randint(1, 999)}'
+                          f'x({generator.randint(1, 99)}^{generator.randint(2, 9)}-{generator.randint(1, 999)})')
+        else:
+            expression = (f'{generator.randint(1, 9999)}.{generator.randint(0, 99)}{generator.choice(operators)}'
+                          f'{generator.randint(1, 999)}x(√({generator.randint(1, 99)})+{generator.randint(0, 9)}.5)²')
+        lines.append((number, expression))
+    return lines
+
+
+def bench_modes(number):
+    """throughput of the float, decimal and fraction modes on batch workloads"""
+    workloads = {'integer expressions': batch_workload(number, integers=True),
+                 'decimal expressions': batch_workload(number)}
+    print_row('', *(f'{mode}, expr/s' for mode in MODES))
+    for name, lines in workloads.items():
+        columns = []
+        for mode in MODES:
+            arithmetic = make_arithmetic(mode)
+            start = time.perf_counter()
+            evaluate_chunk(lines, arithmetic)
+            columns.append(f'{len(lines) / (time.perf_counter() - start):.0f}')
+        print_row(name, *columns)
+
+
+def bench_keys(number):
+    """latency of key presses from the event to the updated screen, in an offscreen window"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtCore, QtGui
+    from PyQt5.QtWidgets import QApplication
+    from calculator import Calculator
+
+    app = QApplication.instance() or QApplication([])
+    window = Calculator(journal_path=None)
+    window.show()
+
+    # typing of expressions without '=', so the worker process does not take part
+    keys = [(QtCore.Qt.Key_unknown, symbol) for symbol in '12+3.5*(4-1)^2/7$9)@5#']
+    keys += [(QtCore.Qt.Key_Backspace, '')] * 3 + [(QtCore.Qt.Key_Delete, '')]
+    latencies = []
+    for i in range(number):
+        key, text = keys[i % len(keys)]
+        event = QtGui.QKeyEvent(QtCore.QEvent.KeyPress, key, QtCore.Qt.NoModifier, text)
+        start = time.perf_counter()
+        QApplication.sendEvent(window, event)
+        app.processEvents()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    window.close()
+
+    latencies.sort()
+    print_row('', 'p50, µs', 'p99, µs', 'max, µs')
+    print_row(f'{number} key presses',
+              f'{latencies[len(latencies) // 2]:.1f}',
+              f'{latencies[min(len(latencies) * 99 // 100, len(latencies) - 1)]:.1f}',
+              f'{latencies[-1]:.1f}')
+
+
+BENCHMARKS = {
+    'engine': bench_engine,
+    'cache': bench_cache,
+    'modes': bench_modes,
+    'keys': bench_keys,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks of the calculator.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), nargs='?', default='engine')
+    parser.add_argument('-n', '--number', type=int, default=2000, help='number of calls in one measurement')
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.number)
@@ -3,11 +3,19 @@
 
 import sys
 
-from math import sqrt
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLineEdit, QVBoxLayout, QGridLayout, QLabel
+from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QLineEdit, QVBoxLayout, QGridLayout, QLabel,
+                             QPlainTextEdit, QFrame, QComboBox, QHBoxLayout)
 from PyQt5 import QtCore, QtGui
 from functools import partial
 
+from modules.buffer import (ExpressionBuffer, DIGIT, POINT, ADD_SUB, MUL_DIV, POW, SQUARE, SQRT,
+                            OPEN_BR, CLOSE_BR, VARIABLE)
+from modules.arithmetic import MODES
+from modules.evaluator import Evaluator
+from modules.keymap import DEFAULT_KEYMAP, load_keymap, build_handlers
+from modules.journal import Journal, JournalWindow, DEFAULT_PATH as DEFAULT_JOURNAL_PATH
+from modules.table import TableWindow
+
 
 class Button(QPushButton):
     """class Button to create identical buttons for the main window"""
@@ -24,7 +32,10 @@ class Button(QPushButton):
 class Calculator(QWidget):
     """A desktop calculator."""
 
-    def __init__(self, parent=None, number_of_transaction_history_lines=15):
+    def __init__(self, parent=None, number_of_transaction_history_lines=15,
+                 evaluation_timeout=2.0, evaluation_memory_limit=512 * 2 ** 20,
+                 precision_mode='float', decimal_precision=28, journal_path=DEFAULT_JOURNAL_PATH,
+                 keymap_path=None):
         QWidget.__init__(self, parent)  # create window
         self.setWindowTitle('Calculator')
         icon = QtGui.QIcon(r"images/calculator.png")
@@ -33,10 +44,28 @@ class Calculator(QWidget):
         self.setMaximumHeight(400)
         self.move(self.width() * -2, 0)  # we will display the window outside the screen
 
-        self.expression = '0'
-        self.history = ['']
+        self.expression = ExpressionBuffer()
+        self.table_window = None
+
+        # all the results are saved in the journal, it is written once in a while
+        self.journal = None
+        self.journal_window = None
+        if journal_path:
+            try:
+                self.journal = Journal(journal_path)
+            except OSError:
+                pass
+        self.journal_timer = QtCore.QTimer(self)
+        self.journal_timer.timeout.connect(self.flush_journal)
+        self.journal_timer.start(2000)
         self.number_of_transaction_history_lines = number_of_transaction_history_lines
 
+        # the expressions are calculated in a separate process, so that 9^9^9 does not freeze the window
+        self.evaluator = Evaluator(evaluation_timeout, evaluation_memory_limit, precision_mode, decimal_precision,
+                                   parent=self)
+        self.evaluator.finished.connect(self.show_result)
+        self.evaluator.failed.connect(self.show_error)
+
         self.main_box = QVBoxLayout()
         self.buttons = QGridLayout()
 
@@ -73,16 +102,55 @@ class Calculator(QWidget):
         self.btn_pow_2 = Button("x²")
         self.btn_pow = Button("xⁿ")
 
+        self.btn_variable = Button("t")
+        self.btn_table = Button("table")
+        self.btn_journal = Button("journal")
+
         self.set_functionality_buttons()
 
-        self.history_screen = QLabel()  # create window to display history of operation
-        self.history_screen.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom)
+        keymap_error = ''
+        try:
+            keymap = dict(DEFAULT_KEYMAP)
+            if keymap_path:
+                keymap.update(load_keymap(keymap_path))
+            self.set_keymap(keymap)
+        except (OSError, ValueError) as error:  # no file, broken JSON, an unknown key or action
+            keymap_error = f'Default keys are used, the keymap has an error: {error}'
+            self.set_keymap(DEFAULT_KEYMAP)
+
+        # create window to display history of operation,
+        # the lines are appended to it, the oldest lines are removed by the widget itself
+        self.history_screen = QPlainTextEdit()
+        self.history_screen.setReadOnly(True)
+        self.history_screen.setFrameStyle(QFrame.NoFrame)
+        self.history_screen.setStyleSheet("background: transparent")
+        # the last line of the history is the expression being typed, it is not kept in the widget
+        self.history_screen.setMaximumBlockCount(max(number_of_transaction_history_lines - 1, 1))
+        self.history_screen.document().setDefaultTextOption(QtGui.QTextOption(QtCore.Qt.AlignRight))
         self.history_screen.setToolTip('''<center>Display the history of the operation</center>''')
 
+        self.expression_screen = QLabel()  # create window to display the expression being typed
+        self.expression_screen.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom)
+        self.expression_screen.setToolTip('''<center>Display the expression being typed</center>''')
+
         self.error_screen = QLabel()  # create window to display errors
         self.error_screen.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom)
         self.error_screen.setMaximumHeight(30)
         self.error_screen.setToolTip('''<center>Display errors of the operation</center>''')
+        self.error_screen.setText(keymap_error)
+
+        self.precision_mode = QComboBox()  # create a list to select the arithmetic
+        self.precision_mode.addItems(MODES)
+        self.precision_mode.setCurrentText(precision_mode)
+        self.precision_mode.setFocusPolicy(QtCore.Qt.NoFocus)  # the keys are processed by the calculator
+        self.precision_mode.setToolTip('''<center>float: the result is rounded to 5 digits</center>
+                                          <center>decimal: exact decimal numbers</center>
+                                          <center>fraction: exact fractions</center>''')
+        self.precision_mode.currentTextChanged.connect(self.set_precision_mode)
+
+        self.status_box = QHBoxLayout()
+        self.status_box.addWidget(self.precision_mode)
+        self.status_box.addWidget(self.error_screen)
 
         self.lcd = QLineEdit('0')  # create a window to display the input data
         self.lcd.setReadOnly(True)
@@ -90,7 +158,8 @@ class Calculator(QWidget):
         self.lcd.setMinimumHeight(30)
 
         self.main_box.addWidget(self.history_screen)
-        self.main_box.addWidget(self.error_screen)
+        self.main_box.addWidget(self.expression_screen)
+        self.main_box.addLayout(self.status_box)
         self.main_box.addWidget(self.lcd)
         self.main_box.addLayout(self.buttons)
         self.setLayout(self.main_box)
@@ -137,6 +206,10 @@ class Calculator(QWidget):
         self.buttons.addWidget(self.btn_pow_2, 4, 4)
         self.buttons.addWidget(self.btn_pow, 4, 5)
 
+        self.buttons.addWidget(self.btn_journal, 5, 0, 1, 3)
+        self.buttons.addWidget(self.btn_variable, 5, 3)
+        self.buttons.addWidget(self.btn_table, 5, 4, 1, 2)
+
         # assignment for handler buttons
         btn_number = (self.btn_0, self.btn_1, self.btn_2, self.btn_3, self.btn_4,
                       self.btn_5, self.btn_6, self.btn_7, self.btn_8, self.btn_9)
@@ -163,6 +236,9 @@ class Calculator(QWidget):
         self.btn_open_br.clicked.connect(self.clc_btn_open_br)
         self.btn_close_br.clicked.connect(self.clc_btn_close_br)
         self.btn_result.clicked.connect(self.clc_btn_result)
+        self.btn_variable.clicked.connect(self.clc_btn_variable)
+        self.btn_table.clicked.connect(self.clc_btn_table)
+        self.btn_journal.clicked.connect(self.clc_btn_journal)
 
         # tooltips for any buttons
         self.btn_back.setToolTip('''<center>[Backspace].\n
@@ -183,88 +259,75 @@ class Calculator(QWidget):
         self.btn_sqrt_2.setToolTip('<center>[shift $]</center>')
         self.btn_pow_2.setToolTip('<center>[shift #]</center>')
         self.btn_pow.setToolTip('<center>[shift ^]</center>')
+        self.btn_variable.setToolTip('<center>variable for the table [t]</center>')
+        self.btn_table.setToolTip('<center>values of the expression with t</center>')
+        self.btn_journal.setToolTip('<center>search all the calculations</center>')
+
+    def set_keymap(self, keymap):
+        """binds the keys {key: action name} to the actions of the calculator (see modules/keymap.py)"""
+        actions = {f'digit_{i}': partial(self.set_number, getattr(self, f'btn_{i}')) for i in range(10)}
+        actions.update({
+            'back': partial(self.del_value, self.btn_back),
+            'clear': partial(self.del_value, self.btn_clear),
+            'clear_history': partial(self.del_value, self.btn_clear_history),
+            'add': partial(self.clc_btn_add_sub, self.btn_add),
+            'sub': partial(self.clc_btn_add_sub, self.btn_sub),
+            'mul': partial(self.clc_btn_mul_sh_div_mod, self.btn_mul),
+            'sh': partial(self.clc_btn_mul_sh_div_mod, self.btn_sh),
+            'div': partial(self.clc_btn_mul_sh_div_mod, self.btn_div),
+            'mod': partial(self.clc_btn_mul_sh_div_mod, self.btn_mod),
+            'round': self.clc_btn_round,
+            'pow': partial(self.clc_btn_pow2_and_pow_any, self.btn_pow),
+            'pow_2': partial(self.clc_btn_pow2_and_pow_any, self.btn_pow_2),
+            'sqrt_2': partial(self.clc_btn_sqrt_2, self.btn_sqrt_2),
+            'point': self.clc_btn_point,
+            'open_br': self.clc_btn_open_br,
+            'close_br': self.clc_btn_close_br,
+            'result': self.clc_btn_result,
+            'variable': self.clc_btn_variable,
+            'table': self.clc_btn_table,
+            'journal': self.clc_btn_journal,
+        })
+        self.key_handlers, self.text_handlers = build_handlers(keymap, actions)
 
     def event(self, e):
         # creating the ability to press all buttons using the keyboard
         if e.type() == QtCore.QEvent.KeyPress:
-            if e.text() == '0':
-                self.set_number(self.btn_0)
-            elif e.text() == '1':
-                self.set_number(self.btn_1)
-            elif e.text() == '2':
-                self.set_number(self.btn_2)
-            elif e.text() == '3':
-                self.set_number(self.btn_3)
-            elif e.text() == '4':
-                self.set_number(self.btn_4)
-            elif e.text() == '5':
-                self.set_number(self.btn_5)
-            elif e.text() == '6':
-                self.set_number(self.btn_6)
-            elif e.text() == '7':
-                self.set_number(self.btn_7)
-            elif e.text() == '8':
-                self.set_number(self.btn_8)
-            elif e.text() == '9':
-                self.set_number(self.btn_9)
-
-            elif e.key() == 16777219:  # ⟻ == Button Backspace
-                self.del_value(self.btn_back)
-            elif e.key() == 16777223:  # C == Delete
-                self.del_value(self.btn_clear)
-            elif e.key() == 16777233:  # CA == End
-                self.del_value(self.btn_clear_history)
-
-            elif e.key() == 43 or e.text() == '+':  # +
-                self.clc_btn_add_sub(self.btn_add)
-            elif e.key() == 45 or e.text() == '-':  # -
-                self.clc_btn_add_sub(self.btn_sub)
-
-            elif e.key() == 42 or e.text() == '*':  # * or [shift 8and*]
-                self.clc_btn_mul_sh_div_mod(self.btn_mul)
-            elif e.key() == 47 or e.text() == '/':  # /
-                self.clc_btn_mul_sh_div_mod(self.btn_sh)
-            elif e.key() == 33 or e.text() == '!':  # div [shift 1and!]
-                self.clc_btn_mul_sh_div_mod(self.btn_div)
-            elif e.key() == 64 or e.text() == '@':  # mod [shift 2and@]
-                self.clc_btn_mul_sh_div_mod(self.btn_mod)
-            elif e.key() == 37 or e.text() == '%':  # % [shift 5and%]
-                self.clc_btn_round()
-
-            elif e.key() == 94 or e.text() == '^':  # ^ [shift 6and^]
-                self.clc_btn_pow2_and_pow_any(self.btn_pow)
-            elif e.key() == 35 or e.text() == '#':  # ² [shift 3and#]
-                self.clc_btn_pow2_and_pow_any(self.btn_pow_2)
-            elif e.key() == 36 or e.text() == '$':  # √ [shift 4and$]
-                self.clc_btn_sqrt_2(self.btn_sqrt_2)
-
-            elif e.key() == 46 or e.text() == '.':  # .
-                self.clc_btn_point()
-            elif e.key() == 40 or e.text() == '(':  # ( [shift 9and(]
-                self.clc_btn_open_br()
-            elif e.key() == 41 or e.text() == ')':  # ) [shift 0and)]
-                self.clc_btn_close_br()
-
-            elif e.key() in (61, 16777221, 16777220) or e.text() in ('=', r'\r'):  # =, Enter
-                self.clc_btn_result()
+            handler = self.text_handlers.get(e.text()) or self.key_handlers.get(e.key())
+            if handler is not None:
+                handler()
 
         return QWidget.event(self, e)  # send farther
 
+    def closeEvent(self, e):
+        self.evaluator.close()
+        if self.journal_window is not None:
+            self.journal_window.cancel_search()  # the search reads the journal which is closed below
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        QWidget.closeEvent(self, e)
+
     def show_expression(self):
-        self.lcd.setText(self.expression)
-        self.history[-1] = self.expression
-        self.history_screen.setText('\n'.join(self.history))
+        self.evaluator.cancel()  # the expression has changed, its old result is no longer needed
+        self.lcd.setText(self.expression.text)
+        self.expression_screen.setText(self.expression.text)
         self.error_screen.setText('')
 
+    def add_to_history(self, line):
+        # show the last ... operations
+        self.history_screen.appendPlainText(line)
+        self.expression_screen.clear()
+
     @QtCore.pyqtSlot()
     def set_number(self, btn):
         value = btn.text()
 
-        if self.expression == '0':
-            self.expression = value
+        if self.expression.is_zero:
+            self.expression.replace_last(value)
         else:
-            if self.expression[-1] not in ('²', ')'):
-                self.expression += value
+            if self.expression.last_kind not in (SQUARE, CLOSE_BR, VARIABLE):
+                self.expression.push(value)
 
         self.show_expression()
 
@@ -273,27 +336,14 @@ class Calculator(QWidget):
         value = btn.text()
 
         if value == '⟻':
-            if len(self.expression) == 1:
-                self.expression = '0'
-            elif self.expression.endswith('√('):
-                if len(self.expression) == 2:
-                    self.expression = '0'
-                else:
-                    self.expression = self.expression[:-2]
-            elif self.expression.endswith('div') or self.expression.endswith('mod'):
-                if len(self.expression) == 3:
-                    self.expression = '0'
-                else:
-                    self.expression = self.expression[:-3]
-            elif len(self.expression) > 1:
-                self.expression = self.expression[:-1]
+            self.expression.pop()
 
         elif value == 'C':
-            self.expression = '0'
+            self.expression.clear()
 
         elif value == 'CA':
-            self.expression = '0'
-            self.history = [self.expression]
+            self.expression.clear()
+            self.history_screen.clear()
 
         self.show_expression()
 
@@ -301,32 +351,27 @@ class Calculator(QWidget):
     def clc_btn_add_sub(self, btn):
         value = btn.text()
 
-        if self.expression == '0':
-            self.expression = value
+        if self.expression.is_zero:
+            self.expression.replace_last(value)
         else:
-            if self.expression[-1].isdigit() or self.expression[-1] in ('x', '÷', '√', '²', '^', '(', ')', 'v', 'd'):
-                self.expression += value
-            elif self.expression[-1] == '.':
-                self.expression += f'0{value}'
-            elif self.expression[-1] in ('+', '-'):
-                self.expression = self.expression[:-1] + value
+            if self.expression.last_kind == POINT:
+                self.expression.push('0')
+                self.expression.push(value)
+            elif self.expression.last_kind == ADD_SUB:
+                self.expression.replace_last(value)
+            else:
+                self.expression.push(value)
 
         self.show_expression()
 
     @QtCore.pyqtSlot()
     def clc_btn_point(self):
-        list_of_digit = []
-        for i in self.expression[::-1]:
-            if i.isdigit() or i == '.':
-                list_of_digit.append(i)
-            else:
-                break
-
-        if not list_of_digit:
-            self.expression += '0.'
-        else:
-            if '.' not in list_of_digit:
-                self.expression += '.'
+        if self.expression.last_kind in (DIGIT, POINT):
+            if not self.expression.has_point:
+                self.expression.push('.')
+        elif self.expression.last_kind not in (SQUARE, CLOSE_BR, VARIABLE):
+            self.expression.push('0')
+            self.expression.push('.')
 
         self.show_expression()
 
@@ -334,29 +379,19 @@ class Calculator(QWidget):
     def clc_btn_mul_sh_div_mod(self, btn):
         value = btn.text()
 
-        if self.expression[-1] == '.':
-            self.expression += f'0{value}'
+        if self.expression.last_kind == POINT:
+            self.expression.push('0')
+            self.expression.push(value)
         else:
-            if self.expression[-1] not in ('^', 'x', '÷', '√', '(', '+', '-', 'v', 'd'):
-                self.expression += value
+            if self.expression.last_kind in (DIGIT, SQUARE, CLOSE_BR, VARIABLE):
+                self.expression.push(value)
 
         self.show_expression()
 
     @QtCore.pyqtSlot()
     def clc_btn_round(self):
-        expression = []
-        for i in self.expression[::-1]:
-            if i.isdigit() or i == '.':
-                if i.isdigit():
-                    expression.append(i)
-                elif i == '.':
-                    expression.append(i)
-                    break
-            else:
-                break
-        if expression and '.' in expression:
-            ind = len(expression)
-            self.expression = self.expression[:-ind]
+        if self.expression.last_kind in (DIGIT, POINT):
+            self.expression.strip_fraction()
 
         self.show_expression()
 
@@ -364,11 +399,11 @@ class Calculator(QWidget):
     def clc_btn_sqrt_2(self, btn):
         value = f'{btn.text()}('
 
-        if self.expression[-1] == '0':
-            self.expression = value
+        if self.expression.is_zero:
+            self.expression.replace_last(value)
         else:
-            if not self.expression[-1].isdigit() and self.expression[-1] not in ('²', ')', '.'):
-                self.expression += value
+            if self.expression.last_kind not in (DIGIT, SQUARE, CLOSE_BR, POINT, VARIABLE):
+                self.expression.push(value)
 
         self.show_expression()
 
@@ -376,68 +411,113 @@ class Calculator(QWidget):
     def clc_btn_pow2_and_pow_any(self, btn):
         value = '²' if btn.text() == 'x²' else '^'
 
-        if self.expression[-1].isdigit() or self.expression[-1] in (')', '²'):
-            self.expression += value
-        elif self.expression[-1] == '.':
-            self.expression += f'0{value}'
+        if self.expression.last_kind in (DIGIT, CLOSE_BR, SQUARE, VARIABLE):
+            self.expression.push(value)
+        elif self.expression.last_kind == POINT:
+            self.expression.push('0')
+            self.expression.push(value)
 
         self.show_expression()
 
     @QtCore.pyqtSlot()
     def clc_btn_open_br(self):
-        if self.expression == '0':
-            self.expression = '('
+        if self.expression.is_zero:
+            self.expression.replace_last('(')
         else:
-            if self.expression[-1] in ('+', '-', 'x', '÷', 'v', 'd', '√', '^', '('):
-                self.expression += '('
+            if self.expression.last_kind in (ADD_SUB, MUL_DIV, SQRT, POW, OPEN_BR):
+                self.expression.push('(')
 
         self.show_expression()
 
     @QtCore.pyqtSlot()
     def clc_btn_close_br(self):
-        parenthesis = [i for i in self.expression if i in ('(', ')')]
-        if (parenthesis.count('(') - parenthesis.count(')')) > 0:
-            if self.expression[-1] == '.':
-                self.expression += '0)'
-            elif self.expression[-1].isdigit() or self.expression[-1] in ('²', ')'):
-                self.expression += ')'
+        if self.expression.depth > 0:
+            if self.expression.last_kind == POINT:
+                self.expression.push('0')
+                self.expression.push(')')
+            elif self.expression.last_kind in (DIGIT, SQUARE, CLOSE_BR, VARIABLE):
+                self.expression.push(')')
 
             self.show_expression()
 
     @QtCore.pyqtSlot()
-    def clc_btn_result(self):
-        parenthesis = [i for i in self.expression if i in ('(', ')')]
-        if (parenthesis.count('(') - parenthesis.count(')')) == 0:
-            expression = self.expression
-            expression = expression.replace('x', '*')
-            expression = expression.replace('÷', '/')
-            expression = expression.replace('div', '//')
-            expression = expression.replace('mod', '%')
-            expression = expression.replace('²', '**2')
-            expression = expression.replace('^', '**')
-            expression = expression.replace('√', 'sqrt')
+    def clc_btn_variable(self):
+        if self.expression.is_zero:
+            self.expression.replace_last('t')
+        else:
+            if self.expression.last_kind in (DIGIT, ADD_SUB, MUL_DIV, POW, SQRT, OPEN_BR):
+                self.expression.push('t')
 
-            try:
-                result = round(eval(expression), 5)
-            except ZeroDivisionError:
-                self.error_screen.setText("You can't divide by zero")
-            except Exception:
-                self.error_screen.setText("Error")
-            else:
-                result = str(result)
-                self.lcd.setText(result)
-                self.history[-1] = f'{self.expression} = {result}'
-                self.history.append('')
+        self.show_expression()
 
-                # show the last ... operations
-                if len(self.history) > self.number_of_transaction_history_lines:
-                    self.history = self.history[1:]
-                self.history_screen.setText('\n'.join(self.history))
+    @QtCore.pyqtSlot()
+    def clc_btn_table(self):
+        expression = '' if self.expression.is_zero else self.expression.text
+        if self.table_window is None:
+            self.table_window = TableWindow(expression, parent=self)
+        else:
+            self.table_window.expression.setText(expression)
+        self.table_window.show()
+        self.table_window.activateWindow()
+        if expression and self.expression.depth == 0:
+            self.table_window.calculate()
+
+    @QtCore.pyqtSlot()
+    def clc_btn_journal(self):
+        if self.journal is None:
+            self.error_screen.setText('The journal is not available')
+            return
+        if self.journal_window is None:
+            self.journal_window = JournalWindow(self.journal, parent=self)
+            self.journal_window.recalled.connect(self.recall)
+        self.journal_window.show()
+        self.journal_window.activateWindow()
+
+    @QtCore.pyqtSlot()
+    def flush_journal(self):
+        if self.journal is not None:
+            self.journal.flush()
+
+    @QtCore.pyqtSlot(str)
+    def recall(self, expression):
+        """returns the expression from the journal to the calculator"""
+        try:
+            self.expression.load(expression)
+        except ValueError as error:  # the journal is a text file, a line may be edited or broken
+            self.error_screen.setText(str(error))
+            return
+        self.show_expression()
 
-                self.expression = result
+    @QtCore.pyqtSlot()
+    def clc_btn_result(self):
+        if self.expression.variables:
+            self.clc_btn_table()  # the expression with t has no single value
+        elif self.expression.depth == 0:
+            self.error_screen.setText('Calculating...')
+            self.evaluator.evaluate(self.expression.text)
         else:
             self.error_screen.setText('Incorrect number of parenthesis')
 
+    @QtCore.pyqtSlot(str)
+    def set_precision_mode(self, mode):
+        self.evaluator.cancel()
+        self.evaluator.mode = mode
+        self.error_screen.setText('')
+
+    @QtCore.pyqtSlot(str, str)
+    def show_result(self, expression, result):
+        self.error_screen.setText('')
+        self.lcd.setText(result)
+        self.add_to_history(f'{expression} = {result}')
+        if self.journal is not None:
+            self.journal.add(expression, result)
+
+        self.expression.load(result)
+
+    @QtCore.pyqtSlot(str, str)
+    def show_error(self, expression, message):
+        self.error_screen.setText(message)
+
 
 if __name__ == "__main__":
     app = QApplication([])
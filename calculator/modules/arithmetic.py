@@ -0,0 +1,206 @@
+"""
+Arithmetic of the calculator: how numbers are read, calculated and displayed.
+
+    float     numbers of Python, the result is rounded to 5 digits after the point
+    decimal   decimal.Decimal with the specified number of significant digits
+    fraction  exact fractions.Fraction, the result is displayed as 'numerator÷denominator'
+
+In the decimal and fraction modes integers stay int as long as possible:
++, -, x, div, mod, the power with a non-negative exponent and
+÷ without a remainder never create Decimal or Fraction objects.
+"""
+
+import math
+import operator
+
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal, localcontext, ROUND_FLOOR
+from fractions import Fraction
+
+
+def format_number(number):
+    """Text of the number without the exponent (1e-05 -> 0.00001), so it can be typed on the calculator."""
+    text = str(number)
+    if 'e' in text or 'E' in text:
+        text = format(Decimal(text), 'f')
+    return text
+
+
+def power(base, exponent):
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError('The result is a complex number')
+    return result
+
+
+class FloatArithmetic:
+    """the numbers of Python: int and float"""
+
+    name = 'float'
+
+    binary_functions = {
+        '+': operator.add,
+        '-': operator.sub,
+        'x': operator.mul,
+        '÷': operator.truediv,
+        'div': operator.floordiv,
+        'mod': operator.mod,
+        '^': power,
+    }
+    unary_functions = {'neg': operator.neg, 'pos': operator.pos, 'sqrt': math.sqrt}
+
+    @staticmethod
+    def number(text):
+        return float(text) if '.' in text else int(text)
+
+    def context(self):
+        """context manager in which the calculation is performed"""
+        return nullcontext()
+
+    @staticmethod
+    def format(value):
+        return format_number(round(value, 5))
+
+
+# the decimal mode
+
+def decimal_true_divide(a, b):
+    if type(a) is int and type(b) is int and a % b == 0:
+        return a // b
+    return Decimal(a) / Decimal(b)
+
+
+def decimal_floor_divide(a, b):
+    if type(a) is int and type(b) is int:
+        return a // b
+    # // of Decimal rounds towards zero, the calculator rounds down like Python
+    return (Decimal(a) / Decimal(b)).to_integral_value(rounding=ROUND_FLOOR)
+
+
+def decimal_mod(a, b):
+    if type(a) is int and type(b) is int:
+        return a % b
+    return a - b * decimal_floor_divide(a, b)
+
+
+def decimal_power(base, exponent):
+    if type(base) is int and type(exponent) is int and exponent >= 0:
+        return base ** exponent
+    if base == 0 and exponent < 0:
+        # Decimal returns Infinity here instead of raising, like the other modes do
+        raise ZeroDivisionError('0 cannot be raised to a negative power')
+    return Decimal(base) ** Decimal(exponent)
+
+
+def decimal_sqrt(value):
+    if type(value) is int and value >= 0:
+        root = math.isqrt(value)
+        if root * root == value:
+            return root
+    return Decimal(value).sqrt()
+
+
+class DecimalArithmetic(FloatArithmetic):
+    """decimal.Decimal with the specified number of significant digits"""
+
+    name = 'decimal'
+
+    binary_functions = {
+        **FloatArithmetic.binary_functions,
+        '÷': decimal_true_divide,
+        'div': decimal_floor_divide,
+        'mod': decimal_mod,
+        '^': decimal_power,
+    }
+    unary_functions = {**FloatArithmetic.unary_functions, 'sqrt': decimal_sqrt}
+
+    def __init__(self, precision=28):
+        self.precision = precision
+
+    @staticmethod
+    def number(text):
+        return Decimal(text) if '.' in text else int(text)
+
+    @contextmanager
+    def context(self):
+        with localcontext() as context:
+            context.prec = self.precision
+            yield context
+
+    @staticmethod
+    def format(value):
+        return format_number(value)
+
+
+# the fraction mode
+
+def fraction_true_divide(a, b):
+    if type(a) is int and type(b) is int and a % b == 0:
+        return a // b
+    return Fraction(a) / b
+
+
+def fraction_power(base, exponent):
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        exponent = exponent.numerator
+    if type(exponent) is int:
+        if type(base) is int and exponent >= 0:
+            return base ** exponent
+        return Fraction(base) ** exponent
+    if isinstance(exponent, Fraction) and exponent.denominator == 2:
+        # x^0.5 is √(x) and x^1.5 is √(x^3), with the same digits as the √ key
+        return fraction_sqrt(Fraction(base) ** exponent.numerator)
+    # other roots of a fraction are not fractions, Python calculates them as float
+    return Fraction(power(base, exponent))
+
+
+def fraction_sqrt(value):
+    value = Fraction(value)
+    if value < 0:
+        raise ValueError('math domain error')
+    numerator, denominator = math.isqrt(value.numerator), math.isqrt(value.denominator)
+    if numerator * numerator == value.numerator and denominator * denominator == value.denominator:
+        return Fraction(numerator, denominator) if denominator != 1 else numerator
+    # the root is irrational, it is calculated with 34 significant digits
+    with localcontext() as context:
+        context.prec = 34
+        return Fraction(Decimal(value.numerator).sqrt() / Decimal(value.denominator).sqrt())
+
+
+class FractionArithmetic(FloatArithmetic):
+    """exact fractions.Fraction"""
+
+    name = 'fraction'
+
+    binary_functions = {
+        **FloatArithmetic.binary_functions,
+        '÷': fraction_true_divide,
+        '^': fraction_power,
+    }
+    unary_functions = {**FloatArithmetic.unary_functions, 'sqrt': fraction_sqrt}
+
+    @staticmethod
+    def number(text):
+        return Fraction(text) if '.' in text else int(text)
+
+    @staticmethod
+    def format(value):
+        if isinstance(value, Fraction):
+            if value.denominator == 1:
+                return str(value.numerator)
+            return f'{value.numerator}÷{value.denominator}'
+        return format_number(value)
+
+
+ARITHMETICS = {arithmetic.name: arithmetic for arithmetic in (FloatArithmetic, DecimalArithmetic, FractionArithmetic)}
+MODES = tuple(ARITHMETICS)
+
+
+def make_arithmetic(mode='float', precision=28):
+    """arithmetic by the name of the mode, precision is used only by the decimal mode"""
+    if mode == DecimalArithmetic.name:
+        return DecimalArithmetic(precision)
+    return ARITHMETICS[mode]()
+
+
+FLOAT = FloatArithmetic()
@@ -0,0 +1,160 @@
+"""
+The expression typed on the calculator as a list of pieces.
+
+Every piece is the text added by one key press ('7', '.', 'div', '√(', ...)
+together with its kind. The buffer keeps the running state of the expression
+(the depth of open parenthesis, whether the current number already has a decimal point,
+the kind of the last piece), so checking the input and deleting the last piece
+do not depend on the length of the expression.
+"""
+
+import re
+
+# kinds of pieces
+DIGIT = 'digit'
+POINT = 'point'
+ADD_SUB = 'add_sub'
+MUL_DIV = 'mul_div'  # x, ÷, div, mod
+POW = 'pow'
+SQUARE = 'square'
+SQRT = 'sqrt'  # √(
+OPEN_BR = 'open_br'
+CLOSE_BR = 'close_br'
+VARIABLE = 'variable'  # t
+
+KINDS = {
+    '.': POINT,
+    '+': ADD_SUB, '-': ADD_SUB,
+    'x': MUL_DIV, '÷': MUL_DIV, 'div': MUL_DIV, 'mod': MUL_DIV,
+    '^': POW,
+    '²': SQUARE,
+    '√(': SQRT,
+    '(': OPEN_BR,
+    ')': CLOSE_BR,
+    't': VARIABLE,
+}
+KINDS.update((digit, DIGIT) for digit in '0123456789')
+
+PIECE_PATTERN = re.compile(r'div|mod|√\(|\S')  # the spaces are skipped
+
+# position of the decimal point of the current number when there is no point
+NO_POINT = -1
+
+
+class ExpressionBuffer:
+    """expression of the calculator with O(1) checks of the input and O(1) backspace"""
+
+    def __init__(self, text='0'):
+        self.pieces = []
+        self.kinds = []
+        self.states = []  # (depth, point) before every piece, to restore them on backspace
+        self.text = ''
+        self.depth = 0  # number of open parenthesis which are not closed
+        self.point = NO_POINT  # index of the decimal point piece in the current number
+        self.variables = 0  # number of the variables in the expression
+        self.load(text)
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.pieces)
+
+    @property
+    def last_kind(self):
+        return self.kinds[-1] if self.kinds else None
+
+    @property
+    def is_zero(self):
+        """the expression is the initial '0'"""
+        return self.text == '0'
+
+    @property
+    def has_point(self):
+        """the current number already has a decimal point"""
+        return self.point != NO_POINT
+
+    def push(self, piece, kind=None):
+        """adds a piece to the end of the expression"""
+        if kind is None:
+            kind = KINDS[piece]
+        self.states.append((self.depth, self.point))
+
+        if kind == POINT:
+            self.point = len(self.pieces)
+        elif kind != DIGIT:
+            self.point = NO_POINT
+        if kind in (OPEN_BR, SQRT):
+            self.depth += 1
+        elif kind == CLOSE_BR:
+            self.depth -= 1
+        elif kind == VARIABLE:
+            self.variables += 1
+
+        self.pieces.append(piece)
+        self.kinds.append(kind)
+        self.text += piece
+
+    def pop(self):
+        """deletes the last piece, the expression '0' remains instead of the last one"""
+        if len(self.pieces) <= 1:
+            self.clear()
+        else:
+            self.drop()
+
+    def drop(self):
+        """deletes the last piece"""
+        piece = self.pieces.pop()
+        if self.kinds.pop() == VARIABLE:
+            self.variables -= 1
+        self.depth, self.point = self.states.pop()
+        self.text = self.text[:-len(piece)]
+
+    def replace_last(self, piece, kind=None):
+        self.drop()
+        self.push(piece, kind)
+
+    def strip_fraction(self):
+        """deletes the decimal point and the digits after it in the current number"""
+        if self.has_point:
+            point = self.point
+            while len(self.pieces) > point:
+                self.drop()
+
+    def clear(self):
+        self.reset()
+        self.push('0', DIGIT)
+
+    def reset(self):
+        """makes the buffer empty, the empty expression is not valid for the calculator"""
+        self.pieces.clear()
+        self.kinds.clear()
+        self.states.clear()
+        self.text = ''
+        self.depth = 0
+        self.point = NO_POINT
+        self.variables = 0
+
+    def load(self, text):
+        """replaces the expression with the text, for example with the result of the calculation.
+
+        Raises ValueError for a text which cannot be typed on the calculator (it may come from
+        the journal edited by hand), the expression is not changed then."""
+        pieces = PIECE_PATTERN.findall(text)
+        depth = 0
+        for piece in pieces:
+            kind = KINDS.get(piece)
+            if kind is None:
+                raise ValueError(f'Unexpected symbol {piece!r}')
+            if kind in (OPEN_BR, SQRT):
+                depth += 1
+            elif kind == CLOSE_BR:
+                depth -= 1
+                if depth < 0:
+                    raise ValueError('A parenthesis is closed before it is opened')
+
+        self.reset()
+        for piece in pieces:
+            self.push(piece)
+        if not self.pieces:
+            self.push('0', DIGIT)
@@ -0,0 +1,302 @@
+"""
+The expression engine of the calculator.
+
+The expression typed on the calculator screen (for example "2x(3+√(16))²÷4")
+is split into tokens, parsed with a Pratt parser into a small tree
+and compiled into a flat list of instructions for a stack evaluator.
+No Python code is generated, so eval() is no longer needed.
+How numbers are read and calculated is defined by the arithmetic (see modules/arithmetic.py).
+
+Operator priority is the same as in Python:
+    ², ^  (right-associative)
+    unary + and -
+    x, ÷, div, mod
+    +, -
+"""
+
+import math
+import re
+
+from collections import OrderedDict
+from decimal import Decimal
+from itertools import count
+
+from modules.arithmetic import FLOAT
+
+
+class ExpressionError(ValueError):
+    """the expression cannot be parsed"""
+
+
+# token kinds
+NUMBER = 'number'
+OPERATOR = 'operator'
+OPEN_BR = '('
+CLOSE_BR = ')'
+SQRT = '√'
+SQUARE = '²'
+VARIABLE = 't'  # x is the multiplication
+END = 'end'
+
+NUMBER_SYMBOLS = frozenset('0123456789.')  # str.isdigit() is also true for '²'
+TOKEN_PATTERN = re.compile(r'[0-9.]+|div|mod|\S')
+
+# left binding power of the binary operators
+BINDING_POWER = {'+': 10, '-': 10, 'x': 20, '÷': 20, 'div': 20, 'mod': 20, '^': 40}
+UNARY_BINDING_POWER = 30
+SQUARE_BINDING_POWER = 50
+
+# the tree is compiled and calculated recursively, a deeper one would exceed the recursion limit of Python
+MAX_DEPTH = 200
+TOO_DEEP_MESSAGE = f'The expression is nested deeper than {MAX_DEPTH} levels'
+
+
+def tokenize(expression, arithmetic=FLOAT):
+    """Splits the expression into a list of tokens (kind, value)."""
+    tokens = []
+    for text in TOKEN_PATTERN.findall(expression):
+        if text[0] in NUMBER_SYMBOLS:
+            try:
+                value = arithmetic.number(text)
+            except (ValueError, ArithmeticError):  # decimal.InvalidOperation is ArithmeticError
+                raise ExpressionError(f'Invalid number {text!r}') from None
+            tokens.append((NUMBER, value))
+        elif text in BINDING_POWER:
+            tokens.append((OPERATOR, text))
+        elif text in (OPEN_BR, CLOSE_BR, SQRT, SQUARE, VARIABLE):
+            tokens.append((text, text))
+        else:
+            raise ExpressionError(f'Unexpected symbol {text!r}')
+    tokens.append((END, None))
+    return tokens
+
+
+class Parser:
+    """Pratt parser, builds a tree of tuples from the list of tokens.
+
+    Nodes of the tree:
+        ('num', value), ('var', name)
+        ('neg', node), ('pos', node), ('sqrt', node)
+        (binary operator, left node, right node)"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.nesting = 0  # calls of expression() on the stack
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def expect(self, kind):
+        token = self.next()
+        if token[0] != kind:
+            raise ExpressionError(f'Expected {kind!r}')
+        return token
+
+    def parse(self):
+        node, _ = self.expression(0)
+        self.expect(END)
+        return node
+
+    def expression(self, right_binding_power):
+        """(node, depth of the node)"""
+        self.nesting += 1
+        if self.nesting > MAX_DEPTH:
+            raise ExpressionError(TOO_DEEP_MESSAGE)
+        node, depth = self.prefix(self.next())
+        while True:
+            kind, value = self.peek()
+            if kind == SQUARE:
+                if SQUARE_BINDING_POWER <= right_binding_power:
+                    break
+                self.next()
+                node = ('^', node, ('num', 2))
+                depth += 1
+            elif kind == OPERATOR:
+                left_binding_power = BINDING_POWER[value]
+                if left_binding_power <= right_binding_power:
+                    break
+                self.next()
+                # the power is right-associative
+                next_binding_power = left_binding_power - 1 if value == '^' else left_binding_power
+                right, right_depth = self.expression(next_binding_power)
+                node = (value, node, right)
+                depth = max(depth, right_depth) + 1
+            elif kind == VARIABLE:
+                # 3t is 3xt
+                if BINDING_POWER['x'] <= right_binding_power:
+                    break
+                right, right_depth = self.expression(BINDING_POWER['x'])
+                node = ('x', node, right)
+                depth = max(depth, right_depth) + 1
+            else:
+                break
+            # 1+1+...+1 is parsed in this loop, but it is compiled and calculated recursively
+            if depth > MAX_DEPTH:
+                raise ExpressionError(TOO_DEEP_MESSAGE)
+        self.nesting -= 1
+        return node, depth
+
+    def prefix(self, token):
+        """(node, depth of the node)"""
+        kind, value = token
+        if kind == NUMBER:
+            return ('num', value), 1
+        if kind == VARIABLE:
+            return ('var', value), 1
+        if kind == OPERATOR and value in ('+', '-'):
+            node, depth = self.expression(UNARY_BINDING_POWER)
+            return ('neg' if value == '-' else 'pos', node), depth + 1
+        if kind == OPEN_BR:
+            node, depth = self.expression(0)
+            self.expect(CLOSE_BR)
+            return node, depth
+        if kind == SQRT:
+            self.expect(OPEN_BR)
+            node, depth = self.expression(0)
+            self.expect(CLOSE_BR)
+            return ('sqrt', node), depth + 1
+        raise ExpressionError('Unexpected end of expression' if kind == END else f'Unexpected {value!r}')
+
+
+def parse(expression, arithmetic=FLOAT):
+    """Returns the tree of the expression."""
+    return Parser(tokenize(expression, arithmetic)).parse()
+
+
+def compile_tree(node, code=None):
+    """Compiles the tree into a list of instructions in reverse Polish notation."""
+    if code is None:
+        code = []
+    kind = node[0]
+    if kind in ('num', 'var'):
+        code.append(node)
+    elif kind in ('neg', 'pos', 'sqrt'):
+        compile_tree(node[1], code)
+        code.append((kind, None))
+    else:
+        compile_tree(node[1], code)
+        compile_tree(node[2], code)
+        code.append((kind, None))
+    return code
+
+
+def compile_expression(expression, arithmetic=FLOAT):
+    """Returns the list of instructions for the expression typed on the calculator."""
+    return tuple(compile_tree(parse(expression, arithmetic)))
+
+
+def evaluate(code, arithmetic=FLOAT, variables=None):
+    """Executes the list of instructions on the stack and returns the result.
+
+    variables are the values of the variables, for example {'t': 2}."""
+    unary_functions = arithmetic.unary_functions
+    binary_functions = arithmetic.binary_functions
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for kind, value in code:
+        if kind == 'num':
+            push(value)
+        elif kind == 'var':
+            if not variables or value not in variables:
+                raise ExpressionError(f'The value of {value} is unknown')
+            push(variables[value])
+        elif kind in unary_functions:
+            push(unary_functions[kind](pop()))
+        else:
+            right = pop()
+            push(binary_functions[kind](pop(), right))
+    return stack[0]
+
+
+class EvaluationCache:
+    """LRU cache of the values of sub-expressions.
+
+    Every node of the tree gets an id, the key of a node consists of its kind
+    and the ids of its children, so a lookup does not depend on the size of the subtree.
+    The operands of + and x are sorted, so 2+3 and 3+2 have the same key.
+    When the tail of a long expression is edited, only the nodes on the path
+    to the changed part are calculated again, the values of the others come from the cache."""
+
+    def __init__(self, maxsize=1024, arithmetic=FLOAT):
+        self.maxsize = maxsize
+        self.arithmetic = arithmetic
+        self.entries = OrderedDict()  # key -> (id, value)
+        self.ids = count()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, node):
+        """value of the tree"""
+        return self.lookup(node)[1]
+
+    def lookup(self, node):
+        """(id, value) of the node"""
+        kind = node[0]
+        if kind == 'num':
+            key = (kind, type(node[1]), node[1])  # 1 and 1.0 are different results
+            children = ()
+        elif kind == 'var':
+            raise ExpressionError(f'The value of {node[1]} is unknown')
+        else:
+            children = [self.lookup(child) for child in node[1:]]
+            if kind in COMMUTATIVE:
+                children.sort()
+            key = (kind, *(child_id for child_id, _ in children))
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        if kind == 'num':
+            value = node[1]
+        elif kind in self.arithmetic.unary_functions:
+            value = self.arithmetic.unary_functions[kind](children[0][1])
+        else:
+            value = self.arithmetic.binary_functions[kind](children[0][1], children[1][1])
+
+        entry = (next(self.ids), value)
+        self.entries[key] = entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return entry
+
+
+COMMUTATIVE = ('+', 'x')
+
+
+def calculate(expression, cache=None, arithmetic=FLOAT):
+    """Calculates the expression typed on the calculator.
+
+    With the cache the tree is calculated through EvaluationCache in the arithmetic of the cache,
+    otherwise the compiled list of instructions is executed.
+    Raises ExpressionError for an incorrect expression, ZeroDivisionError, ValueError
+    and ArithmeticError for incorrect operations."""
+    if cache is not None:
+        arithmetic = cache.arithmetic
+    with arithmetic.context():
+        if cache is None:
+            result = evaluate(compile_expression(expression, arithmetic), arithmetic)
+        else:
+            result = cache.evaluate(parse(expression, arithmetic))
+    if isinstance(result, float) and not math.isfinite(result) or \
+            isinstance(result, Decimal) and not result.is_finite():
+        raise OverflowError('The result is too large')
+    return result
@@ -0,0 +1,130 @@
+"""
+Calculation of expressions outside the GUI thread.
+
+Evaluator keeps one worker process ready, sends it the expression and polls
+the answer with a QTimer, so the window stays responsive during long calculations.
+The result comes back through the finished and failed signals.
+"""
+
+import multiprocessing
+import time
+
+from PyQt5 import QtCore
+
+from modules.worker import serve, ERROR_MESSAGE
+
+TIMEOUT_MESSAGE = 'Timed out'
+
+
+class Evaluator(QtCore.QObject):
+    """calculates expressions in a worker process with limited time and memory"""
+
+    finished = QtCore.pyqtSignal(str, str)  # expression, result
+    failed = QtCore.pyqtSignal(str, str)  # expression, error message
+
+    def __init__(self, timeout=2.0, memory_limit=512 * 2 ** 20, mode='float', precision=28,
+                 poll_interval=5, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.timeout = timeout  # seconds
+        self.memory_limit = memory_limit  # bytes
+        self.mode = mode  # see modules/arithmetic.py
+        self.precision = precision  # significant digits of the decimal mode
+
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.connection = None
+
+        self.expression = None  # the expression being calculated
+        self.task = None  # (expression, mode, precision) sent to the worker process
+        self.started = 0.0
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(poll_interval)
+        self.timer.timeout.connect(self.poll)
+
+        self.start_process()  # the process starts in advance, the first result will not wait for it
+
+    @property
+    def is_busy(self):
+        return self.expression is not None
+
+    def start_process(self):
+        self.ready = False  # the new process imports the modules, it is not timed until it says it is ready
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(target=serve, args=(child_connection, self.memory_limit), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def stop_process(self):
+        if self.process is not None:
+            self.connection.close()
+            self.process.terminate()
+            self.process.join(1)
+            self.process = None
+            self.connection = None
+
+    def evaluate(self, expression):
+        """starts the calculation, the previous one is cancelled"""
+        task = (expression, self.mode, self.precision)
+        if self.is_busy and task == self.task:
+            return
+        self.cancel()
+        if self.process is None or not self.process.is_alive():
+            self.stop_process()
+            self.start_process()
+
+        self.connection.send(task)
+        self.task = task
+        self.expression = expression
+        self.started = time.monotonic()
+        self.timer.start()
+
+    def cancel(self):
+        """interrupts the calculation, the worker process is restarted"""
+        if self.is_busy:
+            self.timer.stop()
+            self.expression = None
+            self.stop_process()
+            self.start_process()
+
+    def close(self):
+        self.timer.stop()
+        self.expression = None
+        self.stop_process()
+
+    @QtCore.pyqtSlot()
+    def poll(self):
+        expression = self.expression
+        answer = None
+        broken = False
+        try:
+            while answer is None and self.connection.poll():
+                message = self.connection.recv()
+                if message[0] == 'ready':
+                    self.ready = True
+                    self.started = time.monotonic()  # the time of the expression is counted from now
+                else:
+                    answer = message
+        except (EOFError, OSError):
+            broken = True  # the pipe was closed by the death of the process
+
+        if answer is not None:
+            status, value = answer
+            self.timer.stop()
+            self.expression = None
+            if status == 'ok':
+                self.finished.emit(expression, value)
+            else:
+                self.failed.emit(expression, value)
+
+        elif broken or not self.process.is_alive():
+            # for example, the memory limit was exceeded outside of Python or the process was killed
+            self.timer.stop()
+            self.expression = None
+            self.stop_process()
+            self.start_process()
+            self.failed.emit(expression, ERROR_MESSAGE)
+
+        elif self.ready and time.monotonic() - self.started > self.timeout:
+            self.cancel()
+            self.failed.emit(expression, TIMEOUT_MESSAGE)
@@ -0,0 +1,315 @@
+"""
+The journal of all the calculations of the calculator.
+
+Every result is appended to a text file as the line 'expression = result'.
+The lines are written in batches. Next to the journal there is an index file with
+the offsets of the lines (8 bytes each), so the last records are read without scanning the journal.
+The search maps the journal into memory and finds the text with mmap.rfind,
+the newest records are found first. JournalSearch goes back through the journal
+in steps of STEP_SIZE bytes, the window makes one step per turn of the event loop,
+so typing in the search field never waits for a scan of the whole file.
+"""
+
+import mmap
+import os
+
+from array import array
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QListWidget, QLabel
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.calculator', 'journal.txt')
+SEPARATOR = ' = '
+STEP_SIZE = 1 << 22  # bytes scanned by one step of the search, a few milliseconds
+
+
+class Journal:
+    """append-only journal of the calculations with a memory-mapped search"""
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=100):
+        self.path = path
+        self.index_path = f'{path}.idx'
+        self.batch_size = batch_size
+        self.pending = []  # lines which are not written yet
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.repair()
+
+        self.file = open(self.path, 'ab')
+        self.index_file = open(self.index_path, 'ab')
+        self.size = self.file.tell()
+        self.count = self.index_file.tell() // 8
+
+        self.reader = open(self.path, 'rb')
+        self.index_reader = open(self.index_path, 'rb')
+        self.map = None
+        self.index_map = None
+        self.offsets = None
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def repair(self):
+        """after a crash: cuts the incomplete last line and adds the missing offsets to the index.
+
+        Only the end of the files is read."""
+        with open(self.path, 'a+b') as file, open(self.index_path, 'a+b') as index_file:
+            size = complete_size(file)
+            file.truncate(size)
+
+            # the offsets which point beyond the journal are removed
+            count = index_file.seek(0, os.SEEK_END) // 8
+            last = None
+            while count:
+                index_file.seek((count - 1) * 8)
+                last = array('Q', index_file.read(8))[0]
+                if last < size:
+                    break
+                count -= 1
+                last = None
+            index_file.truncate(count * 8)
+
+            # the lines after the last indexed one
+            start = last if last is not None else 0
+            file.seek(start)
+            data = file.read(size - start)
+            offsets = array('Q')
+            position = data.find(b'\n') + 1 if last is not None else 0
+            while position < len(data):
+                offsets.append(start + position)
+                position = data.find(b'\n', position) + 1
+            index_file.write(offsets.tobytes())
+
+    def add(self, expression, result):
+        self.pending.append(f'{expression}{SEPARATOR}{result}\n'.encode('utf-8'))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """writes the pending lines, the journal is written before the index"""
+        if not self.pending:
+            return
+        self.unmap()
+        offsets = array('Q')
+        position = self.size
+        for line in self.pending:
+            offsets.append(position)
+            position += len(line)
+
+        self.file.write(b''.join(self.pending))
+        self.file.flush()
+        self.index_file.write(offsets.tobytes())
+        self.index_file.flush()
+
+        self.size = position
+        self.count += len(self.pending)
+        self.pending.clear()
+
+    def unmap(self):
+        if self.map is not None:
+            self.offsets.release()
+            self.offsets = None
+            self.map.close()
+            self.map = None
+            self.index_map.close()
+            self.index_map = None
+
+    def mapping(self):
+        """memory-mapped journal or None if the journal is empty"""
+        self.flush()
+        if self.map is None and self.size:
+            self.map = mmap.mmap(self.reader.fileno(), self.size, access=mmap.ACCESS_READ)
+            self.index_map = mmap.mmap(self.index_reader.fileno(), self.count * 8, access=mmap.ACCESS_READ)
+            self.offsets = memoryview(self.index_map).cast('Q')
+        return self.map
+
+    def record(self, number):
+        """the line number of the journal, the first line has the number 0"""
+        data = self.mapping()
+        start = self.offsets[number]
+        end = self.offsets[number + 1] if number + 1 < self.count else self.size
+        return data[start:end - 1].decode('utf-8')
+
+    def recent(self, limit=100):
+        """the last records, the newest first"""
+        self.flush()
+        return [self.record(number) for number in range(self.count - 1, max(self.count - limit, 0) - 1, -1)]
+
+    def search(self, text, prefix=False, limit=100):
+        """records which contain the text (or start with it), the newest first"""
+        if not text:
+            return self.recent(limit)
+        search = JournalSearch(self, text, prefix, limit)
+        while not search.step():
+            pass
+        return search.found
+
+    def close(self):
+        self.flush()
+        self.unmap()
+        for file in (self.file, self.index_file, self.reader, self.index_reader):
+            file.close()
+
+
+class JournalSearch:
+    """the search of the text in the journal, step by step from the end, the newest records first.
+
+    The journal is append-only, so the records added during the search do not move the part
+    which is left to search, they are not found by this search."""
+
+    def __init__(self, journal, text, prefix=False, limit=100, step_size=STEP_SIZE):
+        self.journal = journal
+        self.query = text.encode('utf-8')
+        self.needle = b'\n' + self.query if prefix else self.query
+        self.prefix = prefix
+        self.limit = limit
+        self.step_size = max(step_size, 2 * len(self.needle))
+        self.found = []
+        self.end = None  # the matches end before it, None before the first step
+        self.done = False
+
+    def step(self):
+        """searches the next step_size bytes back, returns True when the search is over"""
+        if self.done:
+            return True
+        data = self.journal.mapping()
+        if data is None:
+            self.done = True
+            return True
+        if self.end is None:
+            self.end = self.journal.size
+
+        query = self.query
+        low = max(self.end - self.step_size, 0)
+        while len(self.found) < self.limit:
+            position = data.rfind(self.needle, low, self.end)
+            if position < 0:
+                break
+            start = position + 1 if self.prefix else data.rfind(b'\n', 0, position) + 1
+            self.found.append(data[start:data.find(b'\n', start)].decode('utf-8'))
+            self.end = start + len(query) - 1 if self.prefix else start  # the next match is in an earlier line
+
+        if len(self.found) >= self.limit:
+            self.done = True
+        elif low == 0:
+            if self.prefix and data[:len(query)] == query:
+                self.found.append(data[:data.find(b'\n')].decode('utf-8'))
+            self.done = True
+        else:
+            # a match which crosses low is found by the next step
+            self.end = min(self.end, low + len(self.needle) - 1)
+        return self.done
+
+
+def complete_size(file, chunk_size=65536):
+    """size of the file without the incomplete last line"""
+    end = file.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(end - chunk_size, 0)
+        file.seek(start)
+        position = file.read(end - start).rfind(b'\n')
+        if position >= 0:
+            return start + position + 1
+        end = start
+    return 0
+
+
+def expression_of(record):
+    """the expression of the record 'expression = result'"""
+    return record.split(SEPARATOR, 1)[0]
+
+
+class JournalWindow(QWidget):
+    """window to search the journal, the selected record returns to the calculator"""
+
+    recalled = QtCore.pyqtSignal(str)  # expression
+
+    def __init__(self, journal, parent=None):
+        QWidget.__init__(self, parent, QtCore.Qt.Window)
+        self.setWindowTitle('Journal')
+        self.setWindowIcon(QtGui.QIcon(r"images/calculator.png"))
+        self.resize(400, 500)
+        self.journal = journal
+
+        self.search_text = QLineEdit()
+        self.search_text.setPlaceholderText('Search')
+        self.search_text.textChanged.connect(self.schedule_search)
+        self.prefix = QCheckBox('from the beginning')
+        self.prefix.stateChanged.connect(self.schedule_search)
+
+        self.search_box = QHBoxLayout()
+        self.search_box.addWidget(self.search_text)
+        self.search_box.addWidget(self.prefix)
+
+        self.records = QListWidget()
+        self.records.setUniformItemSizes(True)
+        self.records.setToolTip('<center>Double click or Enter returns the expression to the calculator</center>')
+        self.records.itemActivated.connect(self.recall)
+
+        self.status = QLabel()
+        self.status.setAlignment(QtCore.Qt.AlignRight)
+
+        # the search starts when the user stops typing
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search)
+
+        # the search makes a step when the events of the window are processed
+        self.current_search = None  # JournalSearch
+        self.step_timer = QtCore.QTimer(self)
+        self.step_timer.setInterval(0)
+        self.step_timer.timeout.connect(self.search_step)
+
+        self.main_box = QVBoxLayout()
+        self.main_box.addLayout(self.search_box)
+        self.main_box.addWidget(self.records)
+        self.main_box.addWidget(self.status)
+        self.setLayout(self.main_box)
+
+    def showEvent(self, e):
+        self.search()
+        QWidget.showEvent(self, e)
+
+    def hideEvent(self, e):
+        self.cancel_search()
+        QWidget.hideEvent(self, e)
+
+    @QtCore.pyqtSlot()
+    def schedule_search(self):
+        self.cancel_search()  # the old results are not needed any more
+        self.search_timer.start()
+
+    def cancel_search(self):
+        self.step_timer.stop()
+        self.current_search = None
+
+    @QtCore.pyqtSlot()
+    def search(self):
+        self.cancel_search()
+        text = self.search_text.text().strip()
+        self.records.clear()
+        if not text:
+            found = self.journal.recent()
+            self.records.addItems(found)
+            self.status.setText(f'{len(found)} of {len(self.journal)} records')
+            return
+        self.current_search = JournalSearch(self.journal, text, self.prefix.isChecked())
+        self.step_timer.start()
+
+    @QtCore.pyqtSlot()
+    def search_step(self):
+        search = self.current_search
+        shown = len(search.found)
+        done = search.step()
+        self.records.addItems(search.found[shown:])  # the newest records appear while the older part is searched
+        if done:
+            self.cancel_search()
+            self.status.setText(f'{len(search.found)} of {len(self.journal)} records')
+        else:
+            self.status.setText(f'{len(search.found)} found, searching...')
+
+    def recall(self, item):
+        self.recalled.emit(expression_of(item.text()))
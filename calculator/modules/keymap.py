@@ -0,0 +1,70 @@
+"""
+Keyboard shortcuts of the calculator.
+
+The keymap binds a key to the name of an action of the calculator.
+A key is either one symbol, which is compared with the text of the key press ('+', '7'),
+or the name of a Qt key ('Key_Backspace'), which is compared with the key code.
+The keymap can be changed with a JSON file of the same form, for example:
+
+    {"Key_Insert": "clear", "s": "sqrt_2"}
+"""
+
+import json
+
+from PyQt5 import QtCore
+
+DEFAULT_KEYMAP = {
+    '0': 'digit_0', '1': 'digit_1', '2': 'digit_2', '3': 'digit_3', '4': 'digit_4',
+    '5': 'digit_5', '6': 'digit_6', '7': 'digit_7', '8': 'digit_8', '9': 'digit_9',
+    'Key_Backspace': 'back',  # ⟻
+    'Key_Delete': 'clear',  # C
+    'Key_End': 'clear_history',  # CA
+    '+': 'add',
+    '-': 'sub',
+    '*': 'mul',  # x [shift 8and*]
+    '/': 'sh',  # ÷
+    '!': 'div',  # div [shift 1and!]
+    '@': 'mod',  # mod [shift 2and@]
+    '%': 'round',  # round [shift 5and%]
+    '^': 'pow',  # ^ [shift 6and^]
+    '#': 'pow_2',  # ² [shift 3and#]
+    '$': 'sqrt_2',  # √ [shift 4and$]
+    '.': 'point',
+    '(': 'open_br',  # ( [shift 9and(]
+    ')': 'close_br',  # ) [shift 0and)]
+    '=': 'result',
+    'Key_Enter': 'result',
+    'Key_Return': 'result',
+    't': 'variable',
+}
+
+
+def load_keymap(path):
+    """keymap from a JSON file {key: action}"""
+    with open(path, encoding='utf-8') as file:
+        keymap = json.load(file)
+    if not isinstance(keymap, dict) or not all(isinstance(action, str) for action in keymap.values()):
+        raise ValueError(f'{path}: the keymap must be a JSON object {{key: action}}')
+    return keymap
+
+
+def key_code(name):
+    """code of the Qt key by its name, for example 'Key_Backspace'"""
+    code = getattr(QtCore.Qt, name, None)
+    if not isinstance(code, int):
+        raise ValueError(f'Unknown key {name!r}')
+    return code
+
+
+def build_handlers(keymap, actions):
+    """dictionaries {key code: handler} and {text: handler} for the dispatch of key presses"""
+    by_code = {}
+    by_text = {}
+    for key, action in keymap.items():
+        if action not in actions:
+            raise ValueError(f'Unknown action {action!r} for the key {key!r}')
+        if key.startswith('Key_'):
+            by_code[key_code(key)] = actions[action]
+        else:
+            by_text[key] = actions[action]
+    return by_code, by_text
@@ -0,0 +1,160 @@
+"""
+The table of values of an expression with the variable t, for example t^2+3t.
+
+The expression is compiled once and executed on NumPy arrays,
+so all the points are calculated in one pass without a Python loop.
+The table displays the arrays through a model which formats only the visible cells.
+"""
+
+import numpy as np
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, QSpinBox, QPushButton,
+                             QLabel, QTableView, QHeaderView)
+
+from modules.arithmetic import FloatArithmetic
+from modules.engine import compile_expression, evaluate, VARIABLE
+
+MAX_POINTS = 10 ** 7
+
+
+class ArrayArithmetic(FloatArithmetic):
+    """float arithmetic on NumPy arrays, incorrect points become nan or inf instead of errors"""
+
+    name = 'array'
+
+    binary_functions = {
+        '+': np.add,
+        '-': np.subtract,
+        'x': np.multiply,
+        '÷': np.true_divide,
+        'div': np.floor_divide,
+        'mod': np.mod,
+        '^': np.power,
+    }
+    unary_functions = {'neg': np.negative, 'pos': np.positive, 'sqrt': np.sqrt}
+
+    @staticmethod
+    def number(text):
+        return float(text)  # int arrays would overflow in the power
+
+    def context(self):
+        return np.errstate(all='ignore')
+
+
+ARRAY = ArrayArithmetic()
+
+
+def tabulate(expression, start, stop, points):
+    """values of t from start to stop and the values of the expression in them"""
+    variable = np.linspace(start, stop, points)
+    code = compile_expression(expression, ARRAY)
+    with ARRAY.context():
+        values = evaluate(code, ARRAY, {VARIABLE: variable})
+    # the expression without t is a number
+    values = np.broadcast_to(np.asarray(values, dtype=float), variable.shape)
+    return variable, values
+
+
+class TableModel(QtCore.QAbstractTableModel):
+    """two columns: t and the value of the expression"""
+
+    def __init__(self, parent=None):
+        QtCore.QAbstractTableModel.__init__(self, parent)
+        self.expression = ''
+        self.variable = np.empty(0)
+        self.values = np.empty(0)
+
+    def set_values(self, expression, variable, values):
+        self.beginResetModel()
+        self.expression = expression
+        self.variable = variable
+        self.values = values
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.variable)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            column = self.variable if index.column() == 0 else self.values
+            return f'{column[index.row()]:.10g}'
+        if role == QtCore.Qt.TextAlignmentRole:
+            return QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return VARIABLE if section == 0 else self.expression
+        return None
+
+
+class TableWindow(QWidget):
+    """window to tabulate an expression with the variable t"""
+
+    def __init__(self, expression='', parent=None):
+        QWidget.__init__(self, parent, QtCore.Qt.Window)
+        self.setWindowTitle('Table')
+        self.setWindowIcon(QtGui.QIcon(r"images/calculator.png"))
+        self.resize(400, 500)
+
+        self.expression = QLineEdit(expression)
+        self.expression.setToolTip('<center>For example: t^2+3t</center>')
+        self.start = QLineEdit('0')
+        self.stop = QLineEdit('10')
+        self.points = QSpinBox()
+        self.points.setRange(1, MAX_POINTS)
+        self.points.setValue(11)
+        self.btn_calculate = QPushButton('Calculate')
+        self.btn_calculate.setAutoDefault(True)
+        self.btn_calculate.clicked.connect(self.calculate)
+        self.expression.returnPressed.connect(self.calculate)
+
+        self.form = QFormLayout()
+        self.form.addRow('Expression:', self.expression)
+        self.range_box = QHBoxLayout()
+        self.range_box.addWidget(self.start)
+        self.range_box.addWidget(QLabel('...'))
+        self.range_box.addWidget(self.stop)
+        self.form.addRow(f'{VARIABLE} from:', self.range_box)
+        self.form.addRow('Points:', self.points)
+
+        self.error_screen = QLabel()
+        self.error_screen.setAlignment(QtCore.Qt.AlignRight)
+
+        self.model = TableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # rows of the same height, the view does not measure a million rows
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.main_box = QVBoxLayout()
+        self.main_box.addLayout(self.form)
+        self.main_box.addWidget(self.btn_calculate)
+        self.main_box.addWidget(self.error_screen)
+        self.main_box.addWidget(self.table)
+        self.setLayout(self.main_box)
+
+    @QtCore.pyqtSlot()
+    def calculate(self):
+        expression = self.expression.text().strip()
+        try:
+            start = float(self.start.text())
+            stop = float(self.stop.text())
+        except ValueError:
+            self.error_screen.setText('Incorrect range')
+            return
+        try:
+            variable, values = tabulate(expression, start, stop, self.points.value())
+        except MemoryError:
+            self.error_screen.setText('Not enough memory')
+        except Exception:
+            self.error_screen.setText('Error')
+        else:
+            self.error_screen.setText('')
+            self.model.set_values(expression, variable, values)
@@ -0,0 +1,68 @@
+"""
+The process which calculates expressions for the calculator.
+
+The process sends ('ready', None) when it has started, then it receives
+(expression, mode, precision) through a pipe and sends back ('ok', result text) or ('error', message). Long calculations such as 9^9^9
+are interrupted from the outside by terminating the process.
+"""
+
+from modules.arithmetic import make_arithmetic, FLOAT
+from modules.engine import calculate, EvaluationCache
+
+ZERO_DIVISION_MESSAGE = "You can't divide by zero"
+MEMORY_MESSAGE = 'Not enough memory'
+ERROR_MESSAGE = 'Error'
+
+
+def set_memory_limit(memory_limit):
+    """limits the memory of the process: the memory used now plus memory_limit bytes.
+
+    Works where the resource module and /proc are available (Linux), elsewhere nothing is limited."""
+    try:
+        import resource
+        with open('/proc/self/statm') as file:
+            used = int(file.read().split()[0]) * resource.getpagesize()
+    except (ImportError, OSError, ValueError):
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = used + memory_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def calculate_text(expression, cache=None, arithmetic=FLOAT):
+    """result of the expression as it is displayed on the calculator"""
+    if cache is not None:
+        arithmetic = cache.arithmetic
+    return arithmetic.format(calculate(expression, cache, arithmetic))
+
+
+def serve(connection, memory_limit=None):
+    """the main loop of the process, it ends when the pipe is closed"""
+    if memory_limit:
+        set_memory_limit(memory_limit)
+    # the user often edits the tail of the expression and calculates it again,
+    # the values of sub-expressions are different in every mode
+    caches = {}
+    connection.send(('ready', None))  # the start of the process is not counted in the time of the expression
+
+    while True:
+        try:
+            expression, mode, precision = connection.recv()
+        except (EOFError, OSError):
+            break
+
+        try:
+            cache = caches.get((mode, precision))
+            if cache is None:
+                cache = caches[mode, precision] = EvaluationCache(arithmetic=make_arithmetic(mode, precision))
+            answer = ('ok', calculate_text(expression, cache))
+        except ZeroDivisionError:
+            answer = ('error', ZERO_DIVISION_MESSAGE)
+        except MemoryError:
+            answer = ('error', MEMORY_MESSAGE)
+        except Exception:
+            answer = ('error', ERROR_MESSAGE)
+        connection.send(answer)
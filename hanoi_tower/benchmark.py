@@ -0,0 +1,208 @@
+# !/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of the Tower of Hanoi.
+
+    python benchmark.py paint --disks 32
+    python benchmark.py state
+    python benchmark.py frame_stewart
+    python benchmark.py log
+    python benchmark.py search --disks 14
+
+The benchmarks which need Qt run without a display (QT_QPA_PLATFORM=offscreen).
+"""
+
+import argparse
+import copy
+import os
+import tempfile
+import time
+import timeit
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def print_row(name, *columns):
+    print(f'{name:<40}' + ''.join(f'{column:>18}' for column in columns))
+
+
+def bench_paint(args):
+    """frame time of the animated tower and the frames per second of the animation"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from modules.state import TowerState
+    from modules.tower_view import TowersView
+
+    app = QApplication.instance() or QApplication([])
+    state = TowerState(args.disks)
+    state.move(0, 1)
+    view = TowersView(state, 'ABC')
+    view.resize(900, 700)
+    view.show()
+    app.processEvents()
+
+    # the synchronous repaint of the whole widget and of the two pegs of a move
+    for name, rects in (('whole widget', [view.rect()]), ('two pegs', [view.column_rect(0), view.column_rect(2)])):
+        start = time.perf_counter()
+        for _ in range(args.number):
+            for rect in rects:
+                view.repaint(rect)
+        print_row(f'{name}, {args.disks} disks', f'{(time.perf_counter() - start) / args.number * 1000:.3f} ms')
+
+    # the flights of the disk between the pegs A and C, 1 second each
+    moves = 3
+    loop = QEventLoop()
+    view.frames = 0
+    start = time.perf_counter()
+    for number in range(moves):
+        source, target = (0, 2) if number % 2 == 0 else (2, 0)
+        state.move(source, target)
+        view.show_move(source, target, 1000)
+        QTimer.singleShot(1000 + 20, loop.quit)
+        loop.exec_()
+    seconds = time.perf_counter() - start
+    print_row(f'animation, {moves} flights of 1 s', f'{view.frames / seconds:.1f} fps')
+    view.close()
+
+
+def list_towers(total_disks):
+    """the former state of the game: lists of disks from the bottom"""
+    solved_tower = list(range(total_disks, 0, -1))
+    return solved_tower, {'A': copy.deepcopy(solved_tower), 'B': [], 'C': []}
+
+
+def bench_state(args):
+    """the operations of a move with the lists of disks and with the bit masks (modules/state.py)"""
+    from modules.state import TowerState
+
+    print_row('operation', 'lists', 'bit masks')
+    for disks in (5, 20, 64):
+        solved_tower, towers = list_towers(disks)
+        state = TowerState(disks)
+
+        def list_move():
+            if len(towers['A']) and (len(towers['B']) == 0 or towers['B'][-1] > towers['A'][-1]):
+                towers['B'].append(towers['A'].pop())
+            towers['A'].append(towers['B'].pop())  # back, the position is the same for every repetition
+
+        def state_move():
+            if state.can_move(0, 1):
+                state.move(0, 1)
+            state.move(1, 0)
+
+        cases = (
+            ('new game', lambda: list_towers(disks), lambda: TowerState(disks)),
+            ('legal move and back', list_move, state_move),
+            ('solved check', lambda: solved_tower in (towers['B'], towers['C']),
+             lambda: state.is_gathered(1) or state.is_gathered(2)),
+            ('position as a key', lambda: hash(tuple(tuple(towers[letter]) for letter in 'ABC')),
+             lambda: hash(state)),
+        )
+        for name, with_lists, with_masks in cases:
+            times = [min(timeit.repeat(function, number=args.number, repeat=5)) / args.number * 1e9
+                     for function in (with_lists, with_masks)]
+            print_row(f'{name}, {disks} disks', *(f'{value:.0f} ns' for value in times))
+
+
+def bench_frame_stewart(args):
+    """the tables of Frame–Stewart for 100 disks and 4..8 pegs, computed and read from the file, and the moves"""
+    from modules.frame_stewart import SplitTable, load_table, multi_peg_solution, MAX_PEGS
+
+    disks = max(args.disks, 100)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'frame_stewart.json')
+        for name, function in (('compute', lambda: SplitTable(disks, MAX_PEGS)),
+                               ('compute and save', lambda: load_table(disks, MAX_PEGS, path)),
+                               ('read from the file', lambda: load_table(disks, MAX_PEGS, path))):
+            start = time.perf_counter()
+            table = function()
+            print_row(f'table of {disks} disks, {name}', f'{(time.perf_counter() - start) * 1000:.2f} ms')
+
+    for pegs in range(4, MAX_PEGS + 1):
+        order = (0, pegs - 1, *range(1, pegs - 1))
+        length = table.length(disks, pegs)
+        start = time.perf_counter()
+        moves = multi_peg_solution(table, disks, order, length // 2)
+        next(moves)
+        first = time.perf_counter() - start
+        count = 0
+        start = time.perf_counter()
+        for _ in zip(range(args.number * 100), moves):
+            count += 1
+        rate = count / (time.perf_counter() - start)
+        print_row(f'{pegs} pegs: move {length // 2 + 1}', f'{first * 1e6:.0f} us', f'{rate:,.0f} moves/s')
+
+
+def bench_log(args):
+    """the packed log of a solution: writing, undo and redo, seeking with and without checkpoints, the file"""
+    from modules.move_log import MoveLog
+    from modules.solver import solution
+    from modules.state import TowerState
+
+    disks = 20
+    state = TowerState(disks)
+    log = MoveLog(state.copy())
+    moves = list(solution(state.positions(), 2))
+    start = time.perf_counter()
+    for _, source, target in moves:
+        state.move(source, target)
+        log.append(source, target, state.pegs)
+    seconds = time.perf_counter() - start
+    print_row(f'append, {len(moves)} moves', f'{seconds / len(moves) * 1e9:.0f} ns', f'{log.size()} bytes')
+
+    start = time.perf_counter()
+    for _ in range(args.number):
+        log.undo()
+    for _ in range(args.number):
+        log.redo()
+    print_row('undo and redo', f'{(time.perf_counter() - start) / args.number / 2 * 1e9:.0f} ns')
+
+    numbers = list(range(len(moves) // 3, len(moves), len(moves) // 30))
+    without = MoveLog(log.seek(0), interval=len(moves) + 1)
+    without.data, without.length = log.data, log.length
+    for name, replay in (('seek, checkpoints', log), ('seek, only the start', without)):
+        start = time.perf_counter()
+        for number in numbers:
+            replay.seek(number)
+        print_row(name, f'{(time.perf_counter() - start) / len(numbers) * 1000:.3f} ms')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'game.hnl')
+        start = time.perf_counter()
+        log.save(path)
+        print_row('save', f'{(time.perf_counter() - start) * 1000:.1f} ms', f'{os.path.getsize(path)} bytes')
+        start = time.perf_counter()
+        MoveLog.load(path)
+        print_row('load and check', f'{(time.perf_counter() - start) * 1000:.1f} ms')
+
+
+def bench_search(args):
+    """the breadth-first search from the tower on A to the tower on the last peg, 3 to 5 pegs"""
+    from modules.search import search, MAX_STATES
+
+    print_row('pegs, disks', 'moves', 'arrangements', 'seconds', 'per second')
+    for pegs in (3, 4, 5):
+        disks = args.disks
+        while pegs ** disks > MAX_STATES:
+            disks -= 1
+        moves, nodes, seconds = search([0] * (disks + 1), [0] + [pegs - 1] * disks, pegs)
+        print_row(f'{pegs} pegs, {disks} disks', len(moves), f'{nodes:,}', f'{seconds:.2f}', f'{nodes / seconds:,.0f}')
+
+
+BENCHMARKS = {
+    'paint': bench_paint,
+    'state': bench_state,
+    'frame_stewart': bench_frame_stewart,
+    'log': bench_log,
+    'search': bench_search,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks of the Tower of Hanoi.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), nargs='?', default='paint')
+    parser.add_argument('-n', '--number', type=int, default=1000, help='number of repetitions')
+    parser.add_argument('--disks', type=int, default=32)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
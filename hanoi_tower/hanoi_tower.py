@@ -1,12 +1,20 @@
-import copy
+import argparse
 import sys
 
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout
-from PyQt5.QtCore import QEvent
+from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QSpinBox, QLineEdit,
+                             QSlider, QFileDialog)
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSlot
 from PyQt5 import QtGui
 
 from functools import partial
 
+from modules.state import TowerState
+from modules.tower_view import TowersView
+from modules.solver import solution, count_moves, positions_after, hint
+from modules.frame_stewart import load_table, multi_peg_solution, multi_peg_positions, MAX_PEGS
+from modules.move_log import MoveLog, MAX_DISKS
+from modules.search import SearchThread
+
 """
 THE TOWER OF HANOI.
 Move the tower of disks, one disk at a time, to another tower.
@@ -15,9 +23,18 @@ Larger disks cannot rest on top of a smaller disk.
 The more disks, the more difficult the puzzle is.
 Initially, all disks are on rod A
     
-The game can be played by pressing the buttons, and the buttons back, up, forward.
+The game can be played by pressing the buttons, and the buttons back, up, forward
+(or the letters of the pegs).
+The Solve button plays the shortest solution from the current position.
+With 4 to 8 pegs it plays the Frame–Stewart solution from the tower on A.
+Every move is written to the log: Undo and Redo step through it, the slider shows any move
+of the game, Save and Load keep the whole game in a file.
+Set puts the disks in any arrangement, Search finds the shortest way to an arrangement, Solve plays it.
+The Hint button tells how many moves are left and the best next move.
 """
 
+LETTERS = "ABCDEFGH"
+
 
 class Button(QPushButton):
     def __init__(self, text: str):
@@ -29,30 +46,91 @@ class HanoiTower(QWidget):
 
     """implementation of the Hanoi Tower game"""
 
-    def __init__(self, total_disks: int = 5, parent=None):
+    def __init__(self, total_disks: int = 5, speed: int = 2, animation: int = 300, number_of_pegs: int = 3,
+                 parent=None):
         QWidget.__init__(self, parent)  # create window
         self.setWindowTitle("Hanoi Tower")
         icon = QtGui.QIcon(r"images/Pyramid.png")
         self.setWindowIcon(icon)
-        self.resize(400, 300)
+        self.resize(max(500, 120 * number_of_pegs), 400)
 
         self.number_of_moves = 0
         self.total_disks = total_disks  # the number of disks used in the puzzle
-        self.solved_tower = list(range(self.total_disks, 0, -1))  # sample solution
-        self.towers = {"A": copy.deepcopy(self.solved_tower), "B": [], "C": []}  # Initially, all disks are on rod A
+        self.number_of_pegs = number_of_pegs  # 3 to 8
+        self.letters = LETTERS[:number_of_pegs]
+        self.state = TowerState(self.total_disks, self.number_of_pegs)  # Initially, all disks are on rod A
         self.from_tower = ''
         self.to_tower = ''
+        self.animation = animation  # milliseconds of the flight of a disk, 0 turns the animation off
 
-        self.btn_a = Button('A')
-        self.btn_b = Button('B')
-        self.btn_c = Button('C')
-        self.btn_a.clicked.connect(partial(self.push_btn_abc, self.btn_a, self.btn_b, self.btn_c, "A"))
-        self.btn_b.clicked.connect(partial(self.push_btn_abc, self.btn_b, self.btn_a, self.btn_c, "B"))
-        self.btn_c.clicked.connect(partial(self.push_btn_abc, self.btn_c, self.btn_a, self.btn_b, "C"))
+        self.buttons = []  # one button per peg
         self.buttons_box = QHBoxLayout()
-        self.buttons_box.addWidget(self.btn_a)
-        self.buttons_box.addWidget(self.btn_b)
-        self.buttons_box.addWidget(self.btn_c)
+        for letter in self.letters:
+            button = Button(letter)
+            button.clicked.connect(partial(self.push_btn_abc, letter))
+            self.buttons.append(button)
+            self.buttons_box.addWidget(button)
+
+        # automatic solution: the moves are computed one by one while the timer plays them
+        self.solution = None  # generator of the moves, see modules/solver.py
+        self.solution_start = None  # positions of the disks when the solution started
+        self.solution_target = None  # index of the peg
+        self.solution_base = 0  # number of moves before the solution started
+        self.solution_done = 0  # moves of the solution which were played
+        self.solution_length = 0
+        self.solution_pegs = None  # (source, target, spares...) of the solution with more than 3 pegs
+        self.solution_path = None  # the moves found by the search, see modules/search.py
+        # the numbers of moves and the splits of Frame–Stewart, see modules/frame_stewart.py
+        self.split_table = load_table(max(self.total_disks, 100)) if self.number_of_pegs > 3 else None
+        self.solve_timer = QTimer(self)
+        self.solve_timer.timeout.connect(self.play_solution)
+        self.moves_per_tick = 1
+
+        self.btn_solve = Button('Solve')
+        self.btn_solve.clicked.connect(self.push_btn_solve)
+        self.speed = QSpinBox()
+        self.speed.setRange(1, 100000)
+        self.speed.setValue(speed)
+        self.speed.setSuffix(' moves/s')
+        self.speed.valueChanged.connect(self.set_speed)
+        self.set_speed(speed)
+        self.jump_to = QLineEdit()
+        self.jump_to.setPlaceholderText('move number')
+        self.jump_to.returnPressed.connect(self.push_btn_jump)
+        self.btn_jump = Button('Jump')
+        self.btn_jump.clicked.connect(self.push_btn_jump)
+        self.solve_box = QHBoxLayout()
+        self.solve_box.addWidget(self.btn_solve)
+        self.solve_box.addWidget(self.speed)
+        self.solve_box.addWidget(self.jump_to)
+        self.solve_box.addWidget(self.btn_jump)
+        self.btn_hint = Button('Hint')
+        self.btn_hint.clicked.connect(self.push_btn_hint)
+        self.solve_box.addWidget(self.btn_hint)
+
+        # the log of the moves, see modules/move_log.py
+        self.log = MoveLog(self.state.copy())
+        self.btn_undo = Button('Undo')
+        self.btn_undo.setShortcut(QtGui.QKeySequence(Qt.CTRL + Qt.Key_Z))
+        self.btn_undo.clicked.connect(self.push_btn_undo)
+        self.btn_redo = Button('Redo')
+        self.btn_redo.setShortcut(QtGui.QKeySequence(Qt.CTRL + Qt.Key_Y))
+        self.btn_redo.clicked.connect(self.push_btn_redo)
+        self.replay = QSlider(Qt.Horizontal)
+        self.replay.setToolTip('<center>Any move of the game</center>')
+        self.replay.valueChanged.connect(self.seek)
+        self.btn_save = Button('Save')
+        self.btn_save.setShortcut(QtGui.QKeySequence(Qt.CTRL + Qt.Key_S))
+        self.btn_save.clicked.connect(self.push_btn_save)
+        self.btn_load = Button('Load')
+        self.btn_load.setShortcut(QtGui.QKeySequence(Qt.CTRL + Qt.Key_O))
+        self.btn_load.clicked.connect(self.push_btn_load)
+        self.log_box = QHBoxLayout()
+        self.log_box.addWidget(self.btn_undo)
+        self.log_box.addWidget(self.btn_redo)
+        self.log_box.addWidget(self.replay, 1)
+        self.log_box.addWidget(self.btn_save)
+        self.log_box.addWidget(self.btn_load)
 
         self.main_box = QVBoxLayout()
 
@@ -62,131 +140,430 @@ class HanoiTower(QWidget):
         self.show_number_of_moves = QLabel('''<center>number of moves = 0</center>''')
         self.messages = QLabel('''<center>...</center>''')
 
-        self.playing_field_a = QLabel("")
-        self.playing_field_b = QLabel("")
-        self.playing_field_c = QLabel("")
-        self.playing_field_box = QHBoxLayout()
-        self.playing_field_box.addWidget(self.playing_field_a)
-        self.playing_field_box.addWidget(self.playing_field_b)
-        self.playing_field_box.addWidget(self.playing_field_c)
+        self.playing_field = TowersView(self.state, self.letters)
 
         self.main_box.addWidget(self.show_number_of_moves)
-        self.main_box.addLayout(self.playing_field_box)
+        self.main_box.addWidget(self.playing_field, 1)
         self.main_box.addWidget(self.messages)
         self.main_box.addLayout(self.buttons_box)
+        self.main_box.addLayout(self.solve_box)
+        self.main_box.addLayout(self.log_box)
+
+        # any arrangement of the disks: the letters of the pegs from the largest disk
+        self.arrangement = QLineEdit()
+        self.arrangement.setPlaceholderText('pegs of the disks from the largest, for example ' +
+                                            (self.letters * self.total_disks)[:self.total_disks])
+        self.btn_set = Button('Set')
+        self.btn_set.clicked.connect(self.push_btn_set)
+        self.btn_search = Button('Search')
+        self.btn_search.clicked.connect(self.push_btn_search)
+        self.search_thread = None
+        self.arrangement_box = QHBoxLayout()
+        self.arrangement_box.addWidget(self.arrangement, 1)
+        self.arrangement_box.addWidget(self.btn_set)
+        self.arrangement_box.addWidget(self.btn_search)
+        self.main_box.addLayout(self.arrangement_box)
 
         self.setLayout(self.main_box)
 
         self.display_towers()
+        self.update_log_view()
         self.show()
 
-    def push_btn_abc(self, btn_1, btn_2, btn_3, letter):
+    def push_btn_abc(self, letter):
         """processing the button click event"""
-        btn_1.setEnabled(False)
-        if btn_2.isEnabled() and btn_3.isEnabled():
+        button = self.buttons[self.letters.index(letter)]
+        if not button.isEnabled():
+            return
+        button.setEnabled(False)
+        enabled = sum(other.isEnabled() for other in self.buttons)
+        if enabled == self.number_of_pegs - 1:
             self.from_tower = letter
-        elif btn_2.isEnabled() or btn_3.isEnabled():
+        elif enabled:
             self.to_tower = letter
-            btn_2.setEnabled(False)
-            btn_3.setEnabled(False)
+            self.set_enabled_false_abc()
             self.is_valid_move()
 
     def set_enabled_true_abc(self):
         """make all buttons active"""
-        self.btn_a.setEnabled(True)
-        self.btn_b.setEnabled(True)
-        self.btn_c.setEnabled(True)
+        for button in self.buttons:
+            button.setEnabled(True)
 
     def set_enabled_false_abc(self):
         """make all buttons inactive"""
-        self.btn_a.setEnabled(False)
-        self.btn_b.setEnabled(False)
-        self.btn_c.setEnabled(False)
+        for button in self.buttons:
+            button.setEnabled(False)
 
     def event(self, e):
-        """redefining the event method for pressing the A, B, C buttons on the keyboard back, up and forward"""
+        """redefining the event method for pressing the A, B, C buttons on the keyboard back, up and forward,
+        and the letters of all the pegs"""
         if e.type() == QEvent.KeyPress:
             if e.key() == 16777234:
-                self.push_btn_abc(self.btn_a, self.btn_b, self.btn_c, "A")
+                self.push_btn_abc("A")
             elif e.key() == 16777235:
-                self.push_btn_abc(self.btn_b, self.btn_a, self.btn_c, "B")
+                self.push_btn_abc("B")
             elif e.key() == 16777236:
-                self.push_btn_abc(self.btn_c, self.btn_a, self.btn_b, "C")
+                self.push_btn_abc("C")
+            elif e.text().upper() in self.letters and e.text():
+                self.push_btn_abc(e.text().upper())
         return QWidget.event(self, e)  # send farther
 
     def is_valid_move(self):
         """valid combination check"""
-        if len(self.towers[self.from_tower]) == 0:
+        from_peg, to_peg = self.letters.index(self.from_tower), self.letters.index(self.to_tower)
+        if self.state.top(from_peg) == 0:
             # The Tower from Tower cannot be empty:
             self.messages.setText("<center>You selected a tower with no disks.</center>")
             self.set_enabled_true_abc()  # Request a move again.
-        elif len(self.towers[self.to_tower]) == 0:
-            # Any disk can be moved to an empty tower:
-            self.messages.setText("<center>...</center>")
-            self.run()
-        elif self.towers[self.to_tower][-1] < self.towers[self.from_tower][-1]:
+        elif not self.state.can_move(from_peg, to_peg):
             self.messages.setText("<center>Can't put larger disks on top of smaller ones.</center>")
             self.set_enabled_true_abc()  # Request a move again.
         else:
+            # Any disk can be moved to an empty tower or onto a larger disk:
             self.messages.setText("<center>...</center>")
             self.run()
 
-    def display_disk(self, width):
-        """Outputs a disk of the specified width. Width 0 means no disk."""
-        if width == 0:
-            # Output a rod segment without a disk:
-            return "<center>||</center>\n"
-        else:
-            # Output disk:
-            disk = "@" * width
-            width = str(width)
-            return f"<center>{disk}{width}||{width}{disk}</center>"
-
-    def display_tower(self, playing_field, letter):
-        """Outputs one tower with disks."""
-        image = """"""
-        # Bring out three towers:
-        for level in range(self.total_disks, -1, -1):
-            if level >= len(self.towers[letter]):
-                image += self.display_disk(0)  # Output an empty rod without a disk.
-            else:
-                image += self.display_disk(self.towers[letter][level])  # Output the disk.
-
-        image += f"<center>{letter}</center>"
-        playing_field.setText(image)
-
     def display_towers(self):
-        """Outputs three tower with disks."""
-        self.display_tower(self.playing_field_a, "A")
-        self.display_tower(self.playing_field_b, "B")
-        self.display_tower(self.playing_field_c, "C")
+        """Outputs the towers with disks."""
+        self.playing_field.stop_animation()
+        self.playing_field.update()
 
     def run(self):
         """Conducts one game.
 
-        The towers dictionary contains the keys "A", "B" и "C", and values is lists,
-        representing a stack of disks. The list contains integers representing
-        the disks are of different sizes, and the beginning of the list represents
-        the bottom of the tower. For playing with 5 discs list [5, 4, 3, 2, 1]
-        represents a filled tower. Empty the list [] list represents a tower without disks.
-        In the list [1, 3] a larger disk located on a smaller disk, this configuration is
-        not allowed. The list [3, 1] is acceptable, since smaller disks can be placed on larger ones."""
+        The state keeps one bit mask per rod, the bit d - 1 is set when the disk d lies on the rod
+        (see modules/state.py). For playing with 5 discs the mask 0b11111 represents a filled tower,
+        the mask 0 represents a tower without disks. The top disk of a rod is its lowest set bit,
+        so a disk can be put on a rod whose lowest bit is higher."""
 
+        self.solution = None  # the position changed, the solution will be found again
+        from_peg, to_peg = self.letters.index(self.from_tower), self.letters.index(self.to_tower)
+        self.make_move(from_peg, to_peg)
+        self.playing_field.show_move(from_peg, to_peg, self.animation)
+        self.update_view(repaint=False)
+
+    def make_move(self, from_peg, to_peg):
         self.number_of_moves += 1
+        self.state.move(from_peg, to_peg)  # Move the top disk from fromTower to toTower
+        self.log.append(from_peg, to_peg, self.state.pegs)
 
-        disk = self.towers[self.from_tower].pop()  # Move the top disk from fromTower to toTower
-        self.towers[self.to_tower].append(disk)
-        self.display_towers()  # Bring out towers and disks
+    def update_view(self, repaint=True):
+        if repaint:
+            self.display_towers()  # Bring out towers and disks
         self.show_number_of_moves.setText(f"<center>Number of moves = {self.number_of_moves}</center>")
         self.set_enabled_true_abc()
+        self.update_log_view()
 
         # Check if the puzzle is solved:
-        if self.solved_tower in (self.towers["B"], self.towers["C"]):
+        if any(self.state.is_gathered(peg) for peg in range(1, self.number_of_pegs)):
             self.messages.setText("<center>You have solved the puzzle! Well done!</center>")
             self.set_enabled_false_abc()
+            self.stop_solution()
+
+    def positions(self):
+        """the peg of every disk: positions[disk] is 0, 1 or 2 (A, B, C)"""
+        return self.state.positions()
+
+    def set_positions(self, positions):
+        self.state.pegs = TowerState.from_positions(positions, self.number_of_pegs).pegs
+
+    def prepare_solution(self):
+        """the shortest solution from the current position to the nearest of the towers B and C,
+        with more pegs the Frame–Stewart solution from the tower on A to the last peg,
+        returns False if there is no solution from the position"""
+        if self.solution is None and self.number_of_pegs > 3:
+            if not self.state.is_gathered(0):
+                self.messages.setText(f"<center>With {self.number_of_pegs} pegs the solution starts "
+                                      f"from the tower on A.</center>")
+                return False
+            self.solution_path = None
+            self.solution_target = self.number_of_pegs - 1
+            self.solution_pegs = (0, self.solution_target, *range(1, self.solution_target))
+            self.solution_length = self.split_table.length(self.total_disks, self.number_of_pegs)
+            self.solution_start = self.positions()
+            self.solution_base = self.number_of_moves
+            self.solution_done = 0
+            self.solution = multi_peg_solution(self.split_table, self.total_disks, self.solution_pegs)
+        elif self.solution is None:
+            self.solution_path = None
+            positions = self.positions()
+            lengths = {peg: count_moves(positions, peg) for peg in (1, 2)}
+            self.solution_target = min(lengths, key=lengths.get)
+            self.solution_length = lengths[self.solution_target]
+            self.solution_start = positions
+            self.solution_base = self.number_of_moves
+            self.solution_done = 0
+            self.solution = solution(positions, self.solution_target)
+        return True
+
+    @pyqtSlot()
+    def push_btn_solve(self):
+        if self.solve_timer.isActive():
+            self.stop_solution()
+            return
+        if not self.prepare_solution() or self.solution_length == self.solution_done:
+            return  # the puzzle is solved
+        self.btn_solve.setText('Stop')
+        self.set_enabled_false_abc()
+        self.solve_timer.start()
+
+    def stop_solution(self):
+        self.solve_timer.stop()
+        self.btn_solve.setText('Solve')
+
+    @pyqtSlot(int)
+    def set_speed(self, speed):
+        # the screen is updated at most 50 times per second, at a higher speed a tick plays several moves
+        self.solve_timer.setInterval(max(1000 // speed, 20))
+        self.moves_per_tick = max(speed * self.solve_timer.interval() // 1000, 1)
+
+    @pyqtSlot()
+    def play_solution(self):
+        touched = set()
+        for _ in range(self.moves_per_tick):
+            move = next(self.solution, None)
+            if move is None:
+                break
+            _, from_peg, to_peg = move
+            self.make_move(from_peg, to_peg)
+            self.solution_done += 1
+            touched.update((from_peg, to_peg))
+
+        if self.moves_per_tick == 1 and touched:
+            # a slow solution is animated, the flight takes most of the time between the moves
+            duration = min(self.animation, self.solve_timer.interval() * 3 // 4)
+            self.playing_field.show_move(from_peg, to_peg, duration)
+        else:
+            self.playing_field.stop_animation()
+            for peg in touched:  # only the pegs which changed are repainted
+                self.playing_field.update(self.playing_field.column_rect(peg))
+        self.messages.setText(f"<center>Move {self.solution_done} of {self.solution_length}</center>")
+        self.update_view(repaint=False)
+        if self.solution_done == self.solution_length:
+            self.stop_solution()  # the way to an arrangement ends without a solved tower
+        if self.solve_timer.isActive():
+            self.set_enabled_false_abc()
+
+    @pyqtSlot()
+    def push_btn_jump(self):
+        """the position after the move k of the solution, the earlier moves are not played"""
+        if not self.prepare_solution():
+            return
+        try:
+            number = int(self.jump_to.text())
+        except ValueError:
+            self.messages.setText("<center>Enter the number of the move.</center>")
+            return
+        if not 0 <= number <= self.solution_length:
+            self.messages.setText(f"<center>The solution has {self.solution_length} moves.</center>")
+            return
+
+        if self.solution_path is not None:
+            state = TowerState.from_positions(self.solution_start, self.number_of_pegs)
+            for _, from_peg, to_peg in self.solution_path[:number]:
+                state.move(from_peg, to_peg)
+            positions = state.positions()
+            self.solution = iter(self.solution_path[number:])
+        elif self.number_of_pegs > 3:
+            positions = multi_peg_positions(self.split_table, self.total_disks, self.solution_pegs, number)
+            # the rest of the solution skips the moves before the number
+            self.solution = multi_peg_solution(self.split_table, self.total_disks, self.solution_pegs, number)
+        else:
+            positions = positions_after(self.solution_start, self.solution_target, number)
+            # the rest of the solution starts from the new position
+            self.solution = solution(positions, self.solution_target)
+        self.set_positions(positions)
+        self.number_of_moves = self.solution_base + number
+        self.solution_done = number
+        self.log.reset(self.state.copy(), self.number_of_moves)  # the skipped moves are not in the log
+        self.messages.setText(f"<center>Move {number} of {self.solution_length}</center>")
+        self.update_view()
+        if self.solve_timer.isActive():
+            self.set_enabled_false_abc()
+
+    @pyqtSlot()
+    def push_btn_hint(self):
+        """the distance to the nearest finished tower on B or C and the best next move"""
+        if self.number_of_pegs > 3:
+            self.messages.setText("<center>The hints work with 3 pegs.</center>")
+            return
+        distance, move, target = hint(self.positions())
+        if move is None:
+            self.messages.setText("<center>The puzzle is solved.</center>")
+            return
+        disk, from_peg, to_peg = move
+        self.messages.setText(f"<center>{distance} moves to the tower on {LETTERS[target]}, "
+                              f"the best move: disk {disk} from {LETTERS[from_peg]} to {LETTERS[to_peg]}</center>")
+
+    def update_log_view(self):
+        self.btn_undo.setEnabled(self.log.can_undo())
+        self.btn_redo.setEnabled(self.log.can_redo())
+        self.replay.blockSignals(True)  # the slider follows the game, it does not seek
+        self.replay.setMaximum(min(len(self.log), 2 ** 31 - 1))
+        self.replay.setValue(min(self.log.position, 2 ** 31 - 1))
+        self.replay.blockSignals(False)
+
+    def leave_solution(self):
+        """the position is changed by the log, the solution will be found again"""
+        self.stop_solution()
+        self.solution = None
+        self.messages.setText("<center>...</center>")
+
+    @pyqtSlot()
+    def push_btn_undo(self):
+        if not self.log.can_undo():
+            return
+        self.leave_solution()
+        from_peg, to_peg = self.log.undo()
+        self.state.move(to_peg, from_peg)
+        self.number_of_moves -= 1
+        self.playing_field.show_move(to_peg, from_peg, self.animation)
+        self.update_view(repaint=False)
+
+    @pyqtSlot()
+    def push_btn_redo(self):
+        if not self.log.can_redo():
+            return
+        self.leave_solution()
+        from_peg, to_peg = self.log.redo()
+        self.state.move(from_peg, to_peg)
+        self.number_of_moves += 1
+        self.playing_field.show_move(from_peg, to_peg, self.animation)
+        self.update_view(repaint=False)
+
+    @pyqtSlot(int)
+    def seek(self, number):
+        """the position after the number of moves of the log, from the nearest checkpoint"""
+        self.leave_solution()
+        self.state.pegs = self.log.seek(number).pegs
+        self.number_of_moves = self.log.base + number
+        self.update_view()
+
+    @pyqtSlot()
+    def push_btn_save(self):
+        path = QFileDialog.getSaveFileName(self, filter="Games (*.hnl)")[0]
+        if path:
+            self.save_game(path)
+
+    @pyqtSlot()
+    def push_btn_load(self):
+        path = QFileDialog.getOpenFileName(self, filter="Games (*.hnl)")[0]
+        if path:
+            self.load_game(path)
+
+    def save_game(self, path):
+        try:
+            self.log.save(path)
+        except OSError as e:
+            self.messages.setText(f"<center>{e}</center>")
+
+    def load_game(self, path):
+        try:
+            log = MoveLog.load(path)
+        except (OSError, ValueError) as e:
+            self.messages.setText(f"<center>{e}</center>")
+            return
+        if len(log.checkpoints[0]) != self.number_of_pegs:
+            self.messages.setText(f"<center>The game is played with {len(log.checkpoints[0])} pegs.</center>")
+            return
+        self.leave_solution()
+        self.log = log
+        self.total_disks = log.total_disks
+        self.state = log.seek(log.position)
+        self.number_of_moves = log.base + log.position
+        if self.split_table is not None and not self.split_table.covers(self.total_disks, self.number_of_pegs):
+            self.split_table = load_table(self.total_disks)
+        self.playing_field.set_state(self.state, self.letters)
+        self.update_view()
+
+    def read_arrangement(self):
+        """positions[disk] of the arrangement in the line, None if it is wrong"""
+        text = self.arrangement.text().strip().upper()
+        if len(text) != self.total_disks or any(letter not in self.letters for letter in text):
+            self.messages.setText(f"<center>Enter {self.total_disks} letters of the pegs "
+                                  f"({self.letters[0]}-{self.letters[-1]}) from the largest disk.</center>")
+            return None
+        return [0] + [self.letters.index(letter) for letter in reversed(text)]
+
+    @pyqtSlot()
+    def push_btn_set(self):
+        """a new game from the arrangement"""
+        positions = self.read_arrangement()
+        if positions is None:
+            return
+        self.stop_search()
+        self.leave_solution()
+        self.set_positions(positions)
+        self.number_of_moves = 0
+        self.log.reset(self.state.copy())
+        self.update_view()
+
+    @pyqtSlot()
+    def push_btn_search(self):
+        """the shortest way from the current position to the arrangement"""
+        if self.search_thread is not None:
+            self.stop_search()
+            self.messages.setText("<center>The search is stopped.</center>")
+            return
+        target = self.read_arrangement()
+        if target is None:
+            return
+        self.leave_solution()
+        self.search_thread = SearchThread(self.positions(), target, self.number_of_pegs, self)
+        self.search_thread.progress.connect(
+            lambda nodes: self.messages.setText(f"<center>Searching: {nodes:,} arrangements</center>"))
+        self.search_thread.ready.connect(self.show_path)
+        self.search_thread.failed.connect(self.search_failed)
+        self.btn_search.setText('Stop')
+        self.messages.setText("<center>Searching...</center>")
+        self.search_thread.start()
+
+    def stop_search(self):
+        if self.search_thread is not None:
+            self.search_thread.requestInterruption()
+            self.search_thread.wait()
+            self.search_thread = None
+            self.btn_search.setText('Search')
+
+    def search_failed(self, text):
+        self.stop_search()
+        self.messages.setText(f"<center>{text}</center>")
+
+    def show_path(self, moves, nodes, seconds):
+        """the way which was found becomes the solution, if the disks were not moved during the search"""
+        start = self.search_thread.start_positions
+        self.stop_search()
+        if start != self.positions():
+            self.messages.setText("<center>The disks were moved during the search, search again.</center>")
+            return
+        self.leave_solution()
+        # Solve plays the way and Jump shows any move of it
+        self.solution_path = moves
+        self.solution = iter(moves)
+        self.solution_start = start
+        self.solution_target = None
+        self.solution_base = self.number_of_moves
+        self.solution_done = 0
+        self.solution_length = len(moves)
+        speed = nodes / seconds if seconds > 0 else 0
+        self.messages.setText(f"<center>{len(moves)} moves, {nodes:,} arrangements in {seconds:.2f} s "
+                              f"({speed:,.0f} per second). Solve plays them.</center>")
+
+    def closeEvent(self, e):
+        self.stop_search()
+        QWidget.closeEvent(self, e)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='The Tower of Hanoi.')
+    parser.add_argument('-n', '--disks', type=int, default=5, help=f'number of disks, up to {MAX_DISKS}')
+    parser.add_argument('-s', '--speed', type=int, default=2, help='moves per second of the automatic solution')
+    parser.add_argument('--animation', type=int, default=300, help='milliseconds of the flight of a disk, 0 - off')
+    parser.add_argument('-p', '--pegs', type=int, default=3, choices=range(3, MAX_PEGS + 1), help='number of pegs')
+    args = parser.parse_args()
+    if not 1 <= args.disks <= MAX_DISKS:
+        parser.error(f'the number of disks must be from 1 to {MAX_DISKS}')  # a saved game keeps at most so many
+
     app_hanoi_tower = QApplication([])
-    hanoi_tower = HanoiTower()
+    hanoi_tower = HanoiTower(args.disks, args.speed, args.animation, args.pegs)
     sys.exit(app_hanoi_tower.exec_())
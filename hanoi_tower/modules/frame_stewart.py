@@ -0,0 +1,153 @@
+"""
+The tower of Hanoi with 4 and more pegs, the Frame–Stewart algorithm.
+
+The tower of n disks moves from the source to the target peg with k pegs in three parts:
+
+    the t smallest disks go to a spare peg, all the k pegs are used
+    the n - t largest disks go to the target, the k - 1 pegs without that spare are used
+    the t smallest disks follow them to the target, all the k pegs are used
+
+so the number of moves is T(n, k) = min over t of 2 T(t, k) + T(n - t, k - 1), T(n, 3) = 2^n - 1.
+SplitTable keeps T and the best t for every number of disks and pegs. It is computed once
+and saved to a JSON file, the next runs read it.
+
+The pegs of a part are a tuple (source, target, spares...). The moves (disk, from, to)
+are computed when they are needed, and any number of the first moves can be skipped
+without computing them: a part which is skipped as a whole costs nothing.
+"""
+
+import json
+import os
+
+from modules.solver import tower_move, tower_positions
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.hanoi_tower', 'frame_stewart.json')
+MAX_PEGS = 8
+
+
+class SplitTable:
+    """the number of moves and the best split for 0..disks disks and 3..pegs pegs"""
+
+    def __init__(self, disks, pegs, moves=None, splits=None):
+        self.disks = disks
+        self.pegs = pegs
+        self.moves = moves if moves is not None else {}  # moves[k][n] = T(n, k)
+        self.splits = splits if splits is not None else {}  # splits[k][n] = t
+        if moves is None:
+            self.compute()
+
+    def compute(self):
+        self.moves[3] = [(1 << size) - 1 for size in range(self.disks + 1)]
+        self.splits[3] = [max(size - 1, 0) for size in range(self.disks + 1)]
+        for pegs in range(4, self.pegs + 1):
+            fewer = self.moves[pegs - 1]
+            moves = [0, 1]
+            splits = [0, 0]
+            split = 1
+            for size in range(2, self.disks + 1):
+                # the best split does not decrease with the number of disks, the search goes on from the last one
+                best = 2 * moves[split] + fewer[size - split]
+                while split + 1 < size and 2 * moves[split + 1] + fewer[size - split - 1] <= best:
+                    split += 1
+                    best = 2 * moves[split] + fewer[size - split]
+                moves.append(best)
+                splits.append(split)
+            self.moves[pegs] = moves
+            self.splits[pegs] = splits
+
+    def covers(self, disks, pegs):
+        return disks <= self.disks and pegs <= self.pegs
+
+    def length(self, size, pegs):
+        return self.moves[pegs][size]
+
+    def split(self, size, pegs):
+        return self.splits[pegs][size]
+
+    def to_json(self):
+        return {'disks': self.disks, 'pegs': self.pegs,
+                'moves': {str(pegs): moves for pegs, moves in self.moves.items()},
+                'splits': {str(pegs): splits for pegs, splits in self.splits.items()}}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['disks'], data['pegs'],
+                   {int(pegs): moves for pegs, moves in data['moves'].items()},
+                   {int(pegs): splits for pegs, splits in data['splits'].items()})
+
+
+def load_table(disks, pegs=MAX_PEGS, path=DEFAULT_PATH):
+    """the table from the file, it is computed and saved when the file is missing or too small"""
+    try:
+        with open(path, encoding='utf-8') as file:
+            table = SplitTable.from_json(json.load(file))
+        if table.covers(disks, pegs):
+            return table
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # no file yet or a broken one, the table is computed again
+    table = SplitTable(disks, pegs)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(table.to_json(), file)
+        os.replace(temporary, path)  # the file appears whole or not at all
+    except OSError:
+        pass  # the table works without the file, it is computed at the next run
+    return table
+
+
+def multi_peg_solution(table, size, pegs, skip=0, first=1):
+    """the moves (disk, from, to) of the tower of the disks first..first + size - 1, without the skip first ones"""
+    if size == 0 or skip >= table.length(size, len(pegs)):
+        return
+    if len(pegs) == 3:
+        for number in range(skip + 1, 1 << size):
+            disk, source, target = tower_move(size, 0, 1, number)
+            yield disk + first - 1, pegs[source], pegs[target]
+        return
+    if size == 1:
+        yield first, pegs[0], pegs[1]
+        return
+    source, target, spare, *others = pegs
+    split = table.split(size, len(pegs))
+    part = table.length(split, len(pegs))
+    bottom = table.length(size - split, len(pegs) - 1)
+    yield from multi_peg_solution(table, split, (source, spare, target, *others), skip, first)
+    yield from multi_peg_solution(table, size - split, (source, target, *others), max(skip - part, 0), first + split)
+    yield from multi_peg_solution(table, split, (spare, target, source, *others), max(skip - part - bottom, 0),
+                                  first)
+
+
+def multi_peg_positions(table, size, pegs, number, positions=None, first=1):
+    """positions[disk] after the number of moves of the tower which stands on pegs[0], without playing them"""
+    if positions is None:
+        positions = [pegs[0]] * (size + 1)
+    if size == 0:
+        return positions
+    if len(pegs) == 3:
+        local = [0] * (size + 1)
+        tower_positions(local, size, 0, 1, number)
+        for disk in range(1, size + 1):
+            positions[disk + first - 1] = pegs[local[disk]]
+        return positions
+    if size == 1:
+        positions[first] = pegs[1] if number > 0 else pegs[0]
+        return positions
+    source, target, spare, *others = pegs
+    split = table.split(size, len(pegs))
+    part = table.length(split, len(pegs))
+    bottom = table.length(size - split, len(pegs) - 1)
+    if number <= part:
+        for disk in range(first + split, first + size):
+            positions[disk] = source
+        multi_peg_positions(table, split, (source, spare, target, *others), number, positions, first)
+    elif number <= part + bottom:
+        for disk in range(first, first + split):
+            positions[disk] = spare
+        multi_peg_positions(table, size - split, (source, target, *others), number - part, positions, first + split)
+    else:
+        for disk in range(first + split, first + size):
+            positions[disk] = target
+        multi_peg_positions(table, split, (spare, target, source, *others), number - part - bottom, positions, first)
+    return positions
@@ -0,0 +1,165 @@
+"""
+The moves of a game packed into bits.
+
+A move is the pair (from, to) of pegs, so there are k (k - 1) different moves:
+6 with 3 pegs fit into 3 bits, 56 with 8 pegs into 6 bits. The codes of the moves
+lie one after another in a bytearray, the move i starts at the bit i * bits.
+
+The log has a cursor: undo steps back, redo steps forward, a new move after undo
+drops the moves after the cursor. Every interval moves the log keeps the position
+(the bit masks of the pegs), so any move is reached from the nearest checkpoint
+with less than interval moves.
+
+The file of a game:
+
+    b'HNL1', pegs, disks, base, length, position     struct '<4sBHQQQ'
+    the masks of the start position                  (disks + 7) // 8 bytes per peg, little endian
+    the codes of the moves                           (length * bits + 7) // 8 bytes
+"""
+
+import struct
+
+from modules.frame_stewart import MAX_PEGS
+from modules.state import TowerState
+
+MAGIC = b'HNL1'
+HEADER = struct.Struct('<4sBHQQQ')
+CHECKPOINT_INTERVAL = 1024
+MAX_DISKS = 64  # as many as the game offers, see --disks
+
+
+class MoveLog:
+    """the moves of the game after the start position, with undo, redo and seek"""
+
+    def __init__(self, start, base=0, interval=CHECKPOINT_INTERVAL):
+        self.pairs = [(source, target) for source in range(len(start.pegs))
+                      for target in range(len(start.pegs)) if source != target]
+        self.codes = {pair: code for code, pair in enumerate(self.pairs)}
+        self.bits = (len(self.pairs) - 1).bit_length()
+        self.mask = (1 << self.bits) - 1
+        self.interval = interval
+        self.reset(start, base)
+
+    def reset(self, start, base=0):
+        """an empty log from the position, base is the number of moves before it"""
+        self.total_disks = start.total_disks
+        self.base = base
+        self.data = bytearray()
+        self.length = 0  # moves in the log
+        self.position = 0  # moves before the cursor
+        self.checkpoints = [tuple(start.pegs)]  # checkpoints[i] is the position after i * interval moves
+
+    def __len__(self):
+        return self.length
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < self.length
+
+    def size(self):
+        """bytes of the packed moves"""
+        return (self.length * self.bits + 7) // 8
+
+    def get(self, number):
+        """(from, to) of the move with the number (from 0)"""
+        return self.pairs[self.code(number)]
+
+    def code(self, number):
+        """the code of the move with the number, the index in pairs"""
+        offset = number * self.bits
+        index = offset >> 3
+        word = self.data[index] | (self.data[index + 1] << 8 if index + 1 < len(self.data) else 0)
+        return (word >> (offset & 7)) & self.mask
+
+    def put(self, number, code):
+        offset = number * self.bits
+        index = offset >> 3
+        shift = offset & 7
+        while len(self.data) < index + 2:
+            self.data.append(0)
+        word = (self.data[index] | self.data[index + 1] << 8) & ~(self.mask << shift) | code << shift
+        self.data[index] = word & 0xff
+        self.data[index + 1] = word >> 8
+
+    def append(self, source, target, pegs):
+        """writes the move at the cursor, pegs is the position after the move"""
+        if self.position < self.length:
+            self.truncate()
+        self.put(self.position, self.codes[source, target])
+        self.position += 1
+        self.length = self.position
+        if self.length % self.interval == 0:
+            self.checkpoints.append(tuple(pegs))
+
+    def truncate(self):
+        """drops the moves after the cursor"""
+        self.length = self.position
+        del self.data[self.size() + 1:]
+        del self.checkpoints[self.length // self.interval + 1:]
+
+    def undo(self):
+        """moves the cursor back, returns (from, to) of the move which must be reverted"""
+        self.position -= 1
+        return self.get(self.position)
+
+    def redo(self):
+        """moves the cursor forward, returns (from, to) of the move which must be played again"""
+        self.position += 1
+        return self.get(self.position - 1)
+
+    def seek(self, number):
+        """the position after the number of moves, at most interval - 1 moves are played"""
+        checkpoint = number // self.interval
+        state = TowerState(self.total_disks, len(self.checkpoints[checkpoint]), self.checkpoints[checkpoint])
+        for move in range(checkpoint * self.interval, number):
+            state.move(*self.get(move))
+        self.position = number
+        return state
+
+    def save(self, path):
+        start = self.checkpoints[0]
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, len(start), self.total_disks, self.base, self.length, self.position))
+            width = (self.total_disks + 7) // 8
+            for mask in start:
+                file.write(mask.to_bytes(width, 'little'))
+            file.write(self.data[:self.size()])
+
+    @classmethod
+    def load(cls, path, interval=CHECKPOINT_INTERVAL):
+        """the log from the file, the checkpoints are made again"""
+        with open(path, 'rb') as file:
+            header = file.read(HEADER.size)
+            if len(header) != HEADER.size or header[:4] != MAGIC:
+                raise ValueError(f'{path} is not a file of the game')
+            _, pegs, disks, base, length, position = HEADER.unpack(header)
+            if not 3 <= pegs <= MAX_PEGS or not 1 <= disks <= MAX_DISKS:
+                raise ValueError(f'{path}: {disks} disks on {pegs} pegs are not supported')
+            width = (disks + 7) // 8
+            start = TowerState(disks, pegs, [int.from_bytes(file.read(width), 'little') for _ in range(pegs)])
+            union = 0
+            for mask in start.pegs:
+                union |= mask
+            if union != start.full or sum(start.pegs) != union:  # the sum is bigger if the masks overlap
+                raise ValueError(f'{path}: every disk must lie on one peg')
+            log = cls(start, base, interval)
+            log.data = bytearray(file.read())
+        if len(log.data) < (length * log.bits + 7) // 8 or position > length:
+            raise ValueError(f'{path} is cut off')
+        # the moves are checked and the checkpoints are made in one pass
+        state = start.copy()
+        for number in range(length):
+            code = log.code(number)
+            if code >= len(log.pairs):  # 6 moves of 3 pegs take 3 bits, the codes 6 and 7 are not used
+                raise ValueError(f'{path}: the move {number + 1} is not a move')
+            source, target = log.pairs[code]
+            if not state.can_move(source, target):
+                raise ValueError(f'{path}: the move {number + 1} is not legal')
+            state.move(source, target)
+            if (number + 1) % interval == 0:
+                log.checkpoints.append(tuple(state.pegs))
+        log.length = length
+        log.position = position
+        return log
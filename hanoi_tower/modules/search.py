@@ -0,0 +1,219 @@
+"""
+The shortest way between any two arrangements of the disks, a breadth-first search.
+
+An arrangement is the number sum(positions[d] * k ** (d - 1)) in the base k (k pegs),
+so the k ** n arrangements are the indexes 0..k ** n - 1 of an array.
+The search goes from both ends in turn, every side marks the arrangements it reached
+in its own array of 2 bits per arrangement:
+
+    0          not reached yet
+    1, 2, 3    reached, 1 + distance % 3
+
+The distances of neighbours differ at most by one, so the way back from the meeting point
+goes to the neighbour with the mark of distance - 1, the parents are not stored.
+The layers are expanded by NumPy in chunks. A layer keeps the indexes and the bit masks
+of the pegs (see modules/state.py): the top disk of every peg is the lowest bit of its mask
+for all the arrangements of the chunk at once, and a legal move changes the index by
+(to - from) * k ** (disk - 1), so the work per arrangement does not depend on the number of disks.
+"""
+
+import time
+
+import numpy as np
+
+from PyQt5 import QtCore
+
+MAX_STATES = 3 ** 18  # 2 arrays of 2 bits per arrangement, about 200 MB
+CHUNK = 1 << 16  # arrangements expanded at once
+
+
+class Interrupted(Exception):
+    pass
+
+
+def encode(positions, pegs):
+    """the index of the arrangement, positions[disk] is the peg of the disk (positions[0] is not used)"""
+    code = 0
+    for disk in range(len(positions) - 1, 0, -1):
+        code = code * pegs + positions[disk]
+    return code
+
+
+def decode(code, total_disks, pegs):
+    positions = [0] * (total_disks + 1)
+    for disk in range(1, total_disks + 1):
+        code, positions[disk] = divmod(code, pegs)
+    return positions
+
+
+def neighbours(positions, pegs):
+    """(disk, from, to) of the legal moves"""
+    tops = {}
+    for disk in range(len(positions) - 1, 0, -1):
+        tops[positions[disk]] = disk
+    for source, disk in tops.items():
+        for target in range(pegs):
+            if target != source and tops.get(target, len(positions)) > disk:
+                yield disk, source, target
+
+
+class Marks:
+    """2 bits per arrangement in a NumPy array"""
+
+    def __init__(self, size):
+        self.cells = np.zeros((size + 3) // 4, dtype=np.uint8)
+
+    def get(self, codes):
+        return (self.cells[codes >> 2] >> ((codes & 3) << 1).astype(np.uint8)) & 3
+
+    def set(self, codes, mark):
+        # the codes are different and not marked yet, but several of them can share a byte
+        np.bitwise_or.at(self.cells, codes >> 2, (np.uint8(mark) << ((codes & 3) << 1).astype(np.uint8)))
+
+    def get_one(self, code):
+        return (int(self.cells[code >> 2]) >> ((code & 3) << 1)) & 3
+
+
+def masks_of(positions, pegs):
+    masks = np.zeros((1, pegs), dtype=np.int64)
+    for disk in range(1, len(positions)):
+        masks[0, positions[disk]] |= 1 << (disk - 1)
+    return masks
+
+
+def expand(codes, masks, powers, moves, marks):
+    """the indexes and the masks of the neighbours of the arrangements which are not marked, every neighbour once"""
+    sources, targets, changes = moves
+    tops = masks & -masks  # the lowest bit is the top disk
+    keys = np.where(tops == 0, np.int64(1) << 62, tops)  # nothing can be put on an empty peg, anything on it
+    disks = np.frexp(tops.astype(np.float64))[1] - 1  # the number of the bit of the top disk
+    # all the moves of all the arrangements at once: a row per arrangement, a column per move
+    rows, columns = np.nonzero(keys[:, sources] < keys[:, targets])
+    moved = disks[rows, sources[columns]]
+    found = codes[rows] + (targets - sources)[columns] * powers[moved]
+    # most of the neighbours are reached already, the masks are made only for the new ones
+    new = marks.get(found) == 0
+    found, first = np.unique(found[new], return_index=True)
+    rows, columns, moved = rows[new][first], columns[new][first], moved[new][first]
+    return found, masks[rows] + (np.int64(1) << moved)[:, None] * changes[columns]
+
+
+def all_moves(pegs):
+    """(from, to) of the moves and the change of the masks by every move, for expand()"""
+    pairs = [(source, target) for source in range(pegs) for target in range(pegs) if source != target]
+    sources = np.array([source for source, _ in pairs])
+    targets = np.array([target for _, target in pairs])
+    changes = np.zeros((len(pairs), pegs), dtype=np.int64)
+    changes[np.arange(len(pairs)), sources] = -1
+    changes[np.arange(len(pairs)), targets] = 1
+    return sources, targets, changes
+
+
+def shortest_path(start, target, pegs, progress=None):
+    """the moves (disk, from, to) from the start to the target arrangement (lists of the pegs of the disks)
+    and the number of the reached arrangements; progress(nodes) is called after every chunk"""
+    total_disks = len(start) - 1
+    size = pegs ** total_disks
+    if size > MAX_STATES:
+        raise ValueError(f'{pegs} ** {total_disks} arrangements are too many, at most {MAX_STATES} are searched')
+    powers = pegs ** np.arange(total_disks, dtype=np.int64)
+    move_table = all_moves(pegs)
+    ends = (encode(start, pegs), encode(target, pegs))
+    if ends[0] == ends[1]:
+        return [], 1
+
+    marks = (Marks(size), Marks(size))
+    frontiers = [(np.array([ends[0]], dtype=np.int64), masks_of(start, pegs)),
+                 (np.array([ends[1]], dtype=np.int64), masks_of(target, pegs))]
+    depths = [0, 0]
+    for side in (0, 1):
+        marks[side].set(frontiers[side][0], 1)
+    nodes = 2
+    meeting = None
+    while meeting is None:
+        side = 0 if len(frontiers[0][0]) <= len(frontiers[1][0]) else 1  # the smaller layer is expanded
+        codes, masks = frontiers[side]
+        if len(codes) == 0:
+            raise ValueError('the target cannot be reached')  # not possible with legal arrangements
+        mark = 1 + (depths[side] + 1) % 3
+        layer_codes = []
+        layer_masks = []
+        for first in range(0, len(codes), CHUNK):
+            chunk = slice(first, first + CHUNK)
+            found, found_masks = expand(codes[chunk], masks[chunk], powers, move_table, marks[side])
+            marks[side].set(found, mark)
+            layer_codes.append(found)
+            layer_masks.append(found_masks)
+            nodes += len(found)
+            if progress is not None:
+                progress(nodes)
+            met = found[marks[1 - side].get(found) != 0]
+            if len(met):
+                meeting = int(met[0])
+                break
+        frontiers[side] = (np.concatenate(layer_codes), np.concatenate(layer_masks))
+        depths[side] += 1
+
+    # the other side reached the meeting point at its current depth, see the docstring
+    halves = []
+    for side in (0, 1):
+        halves.append(walk_back(meeting, depths[side], marks[side], total_disks, pegs))
+    moves = [(disk, target, source) for disk, source, target in reversed(halves[0])] + halves[1]
+    return moves, nodes
+
+
+def walk_back(code, depth, marks, total_disks, pegs):
+    """the moves from the arrangement at the depth to the end of the search where the marks started"""
+    moves = []
+    positions = decode(code, total_disks, pegs)
+    for distance in range(depth, 0, -1):
+        wanted = 1 + (distance - 1) % 3
+        for disk, source, target in neighbours(positions, pegs):
+            following = code + (target - source) * pegs ** (disk - 1)
+            if marks.get_one(following) == wanted:
+                moves.append((disk, source, target))
+                positions[disk] = target
+                code = following
+                break
+    return moves
+
+
+def search(start, target, pegs, progress=None):
+    """shortest_path() with the time: (moves, reached arrangements, seconds)"""
+    begin = time.perf_counter()
+    moves, nodes = shortest_path(start, target, pegs, progress)
+    return moves, nodes, time.perf_counter() - begin
+
+
+class SearchThread(QtCore.QThread):
+    """searches the shortest way outside the GUI thread"""
+
+    progress = QtCore.pyqtSignal(object)  # reached arrangements, the number can be bigger than int
+    ready = QtCore.pyqtSignal(object, object, float)  # moves, reached arrangements, seconds of work
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, start, target, pegs, parent=None):
+        QtCore.QThread.__init__(self, parent)
+        self.start_positions = list(start)
+        self.target_positions = list(target)
+        self.pegs = pegs
+        self.reported = 0.0
+
+    def report_progress(self, nodes):
+        if self.isInterruptionRequested():
+            raise Interrupted()
+        now = time.perf_counter()
+        if now - self.reported >= 0.1:  # the layers of 3 pegs are small, the window is not flooded
+            self.reported = now
+            self.progress.emit(nodes)
+
+    def run(self):
+        try:
+            moves, nodes, seconds = search(self.start_positions, self.target_positions, self.pegs,
+                                           self.report_progress)
+        except Interrupted:
+            return
+        except (ValueError, MemoryError) as error:
+            self.failed.emit(str(error) or 'not enough memory')
+        else:
+            self.ready.emit(moves, nodes, seconds)
@@ -0,0 +1,124 @@
+"""
+The optimal solution of the Tower of Hanoi from any legal position.
+
+The pegs are numbered 0, 1, 2 (A, B, C), the disks 1..n from the smallest,
+positions[disk] is the peg of the disk (positions[0] is not used).
+
+The shortest way to gather all the disks on the target peg is found from the largest disk:
+if it is on the target, it stays there, otherwise the smaller disks first go to the third peg,
+the disk moves to the target, and the smaller disks follow it as a whole tower.
+So the solution is a plan of at most n steps, every step is one disk or a whole tower:
+
+    ('disk', d, from, to)      one move of the disk d
+    ('tower', m, from, to)     the 2^m - 1 moves of the tower of the m smallest disks
+
+The moves of a tower are not stored: the move k of the tower moves the disk
+with the number of trailing zeros of k plus 1, and every disk goes round the pegs
+in its own direction, so each move and the position after any move take O(1) per disk.
+
+hint() needs only the plans: the distance is the sum of the lengths of the steps,
+the best move is the first move of the first step.
+"""
+
+DISK = 'disk'
+TOWER = 'tower'
+
+
+def plan(positions, target):
+    """steps of the shortest solution, found in O(n)"""
+    steps = []
+    peg = target
+    for disk in range(len(positions) - 1, 0, -1):
+        if positions[disk] == peg:
+            continue
+        spare = 3 - positions[disk] - peg
+        # the smaller disks go to the spare peg first, these steps are found in the next iterations
+        steps.append((TOWER, disk - 1, spare, peg))
+        steps.append((DISK, disk, positions[disk], peg))
+        peg = spare
+    steps.reverse()
+    return steps
+
+
+def step_length(step):
+    kind, size, _, _ = step
+    return 1 if kind == DISK else (1 << size) - 1
+
+
+def count_moves(positions, target):
+    """the minimum number of moves to gather all the disks on the target peg"""
+    return sum(step_length(step) for step in plan(positions, target))
+
+
+def tower_cycle(size, disk, source, target):
+    """the pegs which the disk visits in turn while the tower moves from the source to the target"""
+    spare = 3 - source - target
+    return (source, target, spare) if (size - disk) % 2 == 0 else (source, spare, target)
+
+
+def tower_move(size, source, target, number):
+    """(disk, from, to) of the move with the number (from 1) of the tower of the size"""
+    disk = (number & -number).bit_length()  # trailing zeros + 1
+    moved = (number - 1 + (1 << (disk - 1))) >> disk  # how many times the disk moved before
+    cycle = tower_cycle(size, disk, source, target)
+    return disk, cycle[moved % 3], cycle[(moved + 1) % 3]
+
+
+def tower_moves(size, source, target):
+    """the moves of the tower one by one, nothing is stored"""
+    for number in range(1, 1 << size):
+        yield tower_move(size, source, target, number)
+
+
+def solution(positions, target):
+    """all the moves (disk, from, to) of the shortest solution, computed when they are needed"""
+    for kind, size, source, destination in plan(positions, target):
+        if kind == DISK:
+            yield size, source, destination
+        else:
+            yield from tower_moves(size, source, destination)
+
+
+def tower_positions(positions, size, source, target, number):
+    """puts the disks of the tower in their places after the number of its moves"""
+    for disk in range(1, size + 1):
+        moved = (number + (1 << (disk - 1))) >> disk
+        positions[disk] = tower_cycle(size, disk, source, target)[moved % 3]
+
+
+def positions_after(positions, target, number):
+    """positions after the number of moves of the shortest solution, without playing them"""
+    positions = list(positions)
+    for step in plan(positions, target):
+        length = step_length(step)
+        kind, size, source, destination = step
+        if number >= length:
+            if kind == DISK:
+                positions[size] = destination
+            else:
+                tower_positions(positions, size, source, destination, length)
+            number -= length
+        else:
+            if kind == TOWER:
+                tower_positions(positions, size, source, destination, number)
+            break
+    return positions
+
+
+def first_move(steps):
+    """(disk, from, to) of the first move of the plan, None if there is nothing to move"""
+    if not steps:
+        return None
+    kind, size, source, destination = steps[0]
+    return (size, source, destination) if kind == DISK else tower_move(size, source, destination, 1)
+
+
+def hint(positions, targets=(1, 2)):
+    """(the minimum number of moves, the best next move, its target) to the nearest of the target pegs, O(n)"""
+    best = None
+    for target in targets:
+        steps = plan(positions, target)
+        distance = sum(step_length(step) for step in steps)
+        if best is None or distance < best[0]:
+            best = distance, first_move(steps), target
+    return best
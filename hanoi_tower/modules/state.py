@@ -0,0 +1,87 @@
+"""
+The position of the game as bit masks, one integer per peg.
+
+The bit d - 1 of a peg is set when the disk d lies on it (the disk 1 is the smallest).
+The top disk of a peg is its lowest set bit, so
+
+    the move is legal      the lowest bit of the source is lower than the lowest bit of the target
+    the tower is gathered  the mask of the peg equals (1 << n) - 1
+
+and the position is a tuple of integers which can be hashed and compared.
+"""
+
+
+def lowest_bit(mask):
+    return mask & -mask
+
+
+class TowerState:
+    """pegs with disks, any number of disks (Python integers have no limit) and pegs"""
+
+    __slots__ = ('pegs', 'total_disks', 'full')
+
+    def __init__(self, total_disks, number_of_pegs=3, pegs=None):
+        self.total_disks = total_disks
+        self.full = (1 << total_disks) - 1
+        # initially, all disks are on the first peg
+        self.pegs = list(pegs) if pegs is not None else [self.full] + [0] * (number_of_pegs - 1)
+
+    @classmethod
+    def from_positions(cls, positions, number_of_pegs=3):
+        """positions[disk] is the peg of the disk, positions[0] is not used"""
+        pegs = [0] * number_of_pegs
+        for disk in range(1, len(positions)):
+            pegs[positions[disk]] |= 1 << (disk - 1)
+        return cls(len(positions) - 1, number_of_pegs, pegs)
+
+    def positions(self):
+        positions = [0] * (self.total_disks + 1)
+        for peg, mask in enumerate(self.pegs):
+            while mask:
+                bit = lowest_bit(mask)
+                positions[bit.bit_length()] = peg
+                mask ^= bit
+        return positions
+
+    def __eq__(self, other):
+        return isinstance(other, TowerState) and self.pegs == other.pegs
+
+    def __hash__(self):
+        return hash(tuple(self.pegs))
+
+    def __repr__(self):
+        return f'TowerState({self.total_disks}, pegs={self.pegs})'
+
+    def copy(self):
+        return TowerState(self.total_disks, len(self.pegs), self.pegs)
+
+    def top(self, peg):
+        """the top disk of the peg, 0 if the peg is empty"""
+        return lowest_bit(self.pegs[peg]).bit_length()
+
+    def count(self, peg):
+        return self.pegs[peg].bit_count()
+
+    def disks(self, peg):
+        """the disks of the peg from the bottom"""
+        mask = self.pegs[peg]
+        return [disk for disk in range(mask.bit_length(), 0, -1) if mask >> (disk - 1) & 1]
+
+    def can_move(self, source, target):
+        disk = self.pegs[source]
+        below = self.pegs[target]
+        # the top disks are the lowest bits of the masks
+        return disk != 0 and (below == 0 or disk & -disk < below & -below)
+
+    def move(self, source, target):
+        """moves the top disk, the move must be legal, returns the disk"""
+        pegs = self.pegs
+        mask = pegs[source]
+        bit = mask & -mask
+        pegs[source] = mask ^ bit
+        pegs[target] |= bit
+        return bit.bit_length()
+
+    def is_gathered(self, peg):
+        """all the disks are on the peg"""
+        return self.pegs[peg] == self.full
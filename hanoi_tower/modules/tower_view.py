@@ -0,0 +1,162 @@
+"""
+The towers drawn with QPainter.
+
+Every peg has its own column of the widget. After a move only the columns of the two pegs
+are repainted, the moving disk can fly from one peg to the other: then only the strip
+above the pegs and the two columns are repainted at each frame.
+"""
+
+import time
+
+from PyQt5.QtCore import Qt, QRect, QRectF, QTimer, pyqtSlot
+from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtWidgets import QWidget
+
+FRAME_INTERVAL = 16  # milliseconds, about 60 frames per second
+
+
+class TowersView(QWidget):
+    """pegs with disks of the state (see modules/state.py), the pegs are signed with the letters"""
+
+    def __init__(self, state, letters, parent=None):
+        QWidget.__init__(self, parent)
+        self.setMinimumSize(300, 150)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # the whole column is painted, nothing behind it is needed
+        self.state = state
+        self.letters = letters
+
+        self.flight = None  # (disk, from index, to index, start, duration) of the disk in the air
+        self.animation_timer = QTimer(self)
+        self.animation_timer.setTimerType(Qt.PreciseTimer)
+        self.animation_timer.setInterval(FRAME_INTERVAL)
+        self.animation_timer.timeout.connect(self.next_frame)
+        self.frames = 0  # painted frames of the animations, for the measurements
+
+    def set_state(self, state, letters):
+        self.state = state
+        self.letters = letters
+        self.stop_animation()
+        self.update()
+
+    @property
+    def total_disks(self):
+        return self.state.total_disks
+
+    # geometry
+
+    def column_width(self):
+        return self.width() / len(self.letters)
+
+    def column_rect(self, index):
+        width = self.column_width()
+        return QRect(int(index * width), 0, int(width) + 2, self.height())
+
+    def disk_height(self):
+        # the place of all the disks, one disk more for the air above the pegs, and the letter
+        return max(min(24.0, (self.height() - 24) / (self.total_disks + 2)), 1.0)
+
+    def base_line(self):
+        return self.height() - 22
+
+    def disk_rect(self, disk, index, level):
+        """rectangle of the disk at the level (0 is the bottom) on the peg with the index"""
+        width = self.column_width()
+        height = self.disk_height()
+        smallest = width * 0.15
+        disk_width = smallest + (width * 0.9 - smallest) * (disk - 1) / max(self.total_disks - 1, 1)
+        x = index * width + (width - disk_width) / 2
+        y = self.base_line() - (level + 1) * height
+        return QRectF(x, y, disk_width, height)
+
+    def air_rect(self, from_index, to_index):
+        """strip above the pegs where the disk flies"""
+        first, last = sorted((from_index, to_index))
+        width = self.column_width()
+        top = self.base_line() - (self.total_disks + 2) * self.disk_height()
+        return QRect(int(first * width), max(int(top), 0), int((last - first + 1) * width) + 2,
+                     int(2 * self.disk_height()) + 2)
+
+    # moves
+
+    def show_move(self, from_index, to_index, duration=0):
+        """repaints the two pegs of the move which was made, duration > 0 animates the disk (milliseconds)"""
+        self.stop_animation()
+        if duration > 0 and self.isVisible():
+            disk = self.state.top(to_index)
+            self.flight = (disk, from_index, to_index, time.perf_counter(), duration / 1000)
+            self.animation_timer.start()
+        self.update(self.column_rect(from_index))
+        self.update(self.column_rect(to_index))
+
+    def stop_animation(self):
+        if self.flight is not None:
+            _, from_index, to_index, _, _ = self.flight
+            self.flight = None
+            self.animation_timer.stop()
+            self.update(self.column_rect(from_index))
+            self.update(self.column_rect(to_index))
+
+    @pyqtSlot()
+    def next_frame(self):
+        disk, from_index, to_index, start, duration = self.flight
+        if time.perf_counter() - start >= duration:
+            self.stop_animation()
+            return
+        self.update(self.column_rect(from_index))
+        self.update(self.column_rect(to_index))
+        self.update(self.air_rect(from_index, to_index))
+
+    def flight_rect(self):
+        """where the flying disk is now: it rises, moves above the pegs and falls"""
+        disk, from_index, to_index, start, duration = self.flight
+        progress = min((time.perf_counter() - start) / duration, 1.0)
+        source = self.disk_rect(disk, from_index, self.state.count(from_index))
+        target = self.disk_rect(disk, to_index, self.state.count(to_index) - 1)
+        air = self.base_line() - (self.total_disks + 1) * self.disk_height()
+        if progress < 1 / 3:  # up
+            part = progress * 3
+            return source.translated(0, (air - source.y()) * part)
+        if progress < 2 / 3:  # across
+            part = (progress - 1 / 3) * 3
+            return QRectF(source.x() + (target.x() - source.x()) * part, air, source.width(), source.height())
+        part = (progress - 2 / 3) * 3  # down
+        return QRectF(target.x(), air + (target.y() - air) * part, target.width(), target.height())
+
+    # painting
+
+    def disk_color(self, disk):
+        return QColor.fromHsv(int(300 * (disk - 1) / max(self.total_disks, 1)), 180, 230)
+
+    def paintEvent(self, e):
+        painter = QPainter(self)
+        painter.fillRect(e.rect(), self.palette().window())
+        height = self.disk_height()
+        width = self.column_width()
+        flying = self.flight[0] if self.flight is not None else None
+        flying_to = self.flight[2] if self.flight is not None else None
+
+        for index, letter in enumerate(self.letters):
+            column = self.column_rect(index)
+            if not e.rect().intersects(column):
+                continue
+            center = index * width + width / 2
+            # peg and base
+            painter.fillRect(QRectF(center - 3, self.base_line() - (self.total_disks + 1) * height,
+                                    6, (self.total_disks + 1) * height), Qt.darkGray)
+            painter.fillRect(QRectF(index * width + 4, self.base_line(), width - 8, 3), Qt.black)
+            painter.drawText(QRectF(index * width, self.base_line() + 3, width, 18), Qt.AlignCenter, letter)
+
+            tower = self.state.disks(index)
+            for level, disk in enumerate(tower):
+                if disk == flying and index == flying_to and level == len(tower) - 1:
+                    continue  # the disk is still in the air
+                self.draw_disk(painter, disk, self.disk_rect(disk, index, level))
+
+        if self.flight is not None:
+            self.draw_disk(painter, flying, self.flight_rect())
+            self.frames += 1
+
+    def draw_disk(self, painter, disk, rect):
+        painter.setPen(QPen(Qt.black, 1) if rect.height() > 3 else Qt.NoPen)
+        painter.setBrush(self.disk_color(disk))
+        painter.drawRoundedRect(rect, min(rect.height() / 3, 4), min(rect.height() / 3, 4))
@@ -0,0 +1,129 @@
+# !/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of TimeManager.
+
+    python benchmark.py report --size 1024
+    python benchmark.py dialogs --seconds 10
+
+The benchmarks run without a display (QT_QPA_PLATFORM=offscreen).
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+from modules.report import ReportThread
+
+
+def print_row(name, *columns):
+    print(f'{name:<40}' + ''.join(f'{column:>18}' for column in columns))
+
+
+def task_text(generator, day, names):
+    """one task as clc_btn_start, clc_btn_pause and clc_btn_stop write it"""
+    name = generator.choice(names)
+    stamp = f'{day:02}.{generator.randint(1, 12):02}.{generator.randint(2018, 2024)} {generator.randint(0, 23):02}:'
+    lines = [f'\nTask: {name}\n\n', f'Start: {stamp}00\n']
+    for pause in range(generator.randint(0, 3)):
+        lines.append(f'Pause/Stop: {stamp}{10 + pause:02}\n')
+        lines.append(f'Pause/Start: {stamp}{20 + pause:02}\n')
+    lines.append(f'Stop: {stamp}59\n\n')
+    seconds = generator.randint(0, 8 * 3600)
+    lines.append(f'The task took: hours={seconds // 3600} minutes={seconds % 3600 // 60} seconds={seconds % 60}.0\n\n')
+    return ''.join(lines)
+
+
+def write_log(path, size, seed=0):
+    """synthetic log of the specified size in bytes"""
+    generator = random.Random(seed)
+    names = [f'ticket-{number}' for number in range(500)]
+    # the log is assembled from blocks of random tasks, a new block is made every time
+    with open(path, 'w', encoding='utf-8') as file:
+        while file.tell() < size:
+            file.write(''.join(task_text(generator, generator.randint(1, 28), names) for _ in range(2000)))
+
+
+def bench_report(size_mb, path=None):
+    """streaming report over a synthetic log on the worker thread"""
+    app = QApplication.instance() or QApplication([])
+    temporary = path is None
+    if temporary:
+        path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    if not os.path.exists(path) or os.path.getsize(path) < size_mb * 2 ** 20:
+        start = time.perf_counter()
+        write_log(path, size_mb * 2 ** 20)
+        print(f'log of {os.path.getsize(path) / 2 ** 20:.0f} MB written in {time.perf_counter() - start:.1f} s')
+
+    results = []
+    progress = []
+    thread = ReportThread([path])
+    thread.progress.connect(progress.append)
+    thread.ready.connect(lambda report, seconds: results.append((report, seconds)))
+    thread.failed.connect(print)
+    thread.finished.connect(app.quit)
+
+    # the GUI thread must stay free while the report is made
+    ticks = []
+    timer = QtCore.QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(10)
+    thread.start()
+    app.exec_()
+    timer.stop()
+
+    if results:
+        report, seconds = results[0]
+        size = os.path.getsize(path) / 2 ** 20
+        gaps = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+        print_row('', 'MB/s', 'tasks/s', 'max GUI gap, ms')
+        print_row(f'{size:.0f} MB, {report.count} tasks, {len(progress)} updates',
+                  f'{size / seconds:.1f}', f'{report.count / seconds:.0f}', f'{max(gaps, default=0):.1f}')
+        print(f'peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
+    if temporary:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+def bench_dialogs(seconds):
+    """CPU time of the process while the first question waits for the user"""
+    from time_manager import TimeManager
+
+    app = QApplication.instance() or QApplication([])
+    window = TimeManager(store_path=None)
+    QtCore.QTimer.singleShot(int(seconds * 1000), app.quit)
+    wall, cpu = time.perf_counter(), time.process_time()
+    app.exec_()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    window.question.close()
+
+    print_row('', 'wall, s', 'CPU, s', 'CPU, %')
+    print_row('question window open', f'{wall:.1f}', f'{cpu:.3f}', f'{cpu / wall * 100:.2f}')
+
+
+BENCHMARKS = {
+    'report': bench_report,
+    'dialogs': bench_dialogs,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks of TimeManager.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), nargs='?', default='report')
+    parser.add_argument('--size', type=int, default=1024, help='size of the synthetic log, MB')
+    parser.add_argument('--path', help='keep the synthetic log in this file to reuse it')
+    parser.add_argument('--seconds', type=float, default=10, help='how long the dialogs stay open')
+    args = parser.parse_args()
+    if args.benchmark == 'report':
+        bench_report(args.size, args.path)
+    else:
+        bench_dialogs(args.seconds)
@@ -0,0 +1,30 @@
+# !/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Compaction of the old segments of a TimeManager file.
+
+    python compact.py work.doc --older-than 30
+
+Every segment work.<time>.doc older than the number of days is replaced by work.<time>.doc.gz,
+where the tasks keep their name, start, stop and duration without the pauses.
+The current file is not changed.
+"""
+
+import argparse
+import os
+
+from modules.archive import compact, segments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compaction of the old segments of a TimeManager file.')
+    parser.add_argument('path', help='the file of TimeManager (.doc or .txt)')
+    parser.add_argument('--older-than', type=float, default=0, help='compact only the segments older than N days')
+    args = parser.parse_args()
+
+    before = sum(os.path.getsize(segment) for segment in segments(args.path))
+    archives = compact(args.path, args.older_than)
+    after = sum(os.path.getsize(segment) for segment in segments(args.path))
+    print(f'{len(archives)} segments compacted, the segments take {after / 2 ** 20:.1f} MB '
+          f'instead of {before / 2 ** 20:.1f} MB')
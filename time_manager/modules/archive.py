@@ -0,0 +1,85 @@
+"""
+Old parts (segments) of the file of TimeManager.
+
+When the file grows too big or a new day, week or month begins, JournalWriter renames it
+to a segment and starts a new file:
+
+    work.doc  ->  work.20240131-180000.doc
+
+compact() folds the segments into summaries: the lines of the pauses are removed,
+every task keeps its name, start, stop and duration, and the result is compressed:
+
+    work.20240131-180000.doc  ->  work.20240131-180000.doc.gz
+
+The report reads the compressed segments like the usual files.
+Only compact() works with the old segments, the program does not touch them.
+"""
+
+import gzip
+import os
+import re
+import time
+
+PERIODS = {'day': '%Y%m%d', 'week': '%G%V', 'month': '%Y%m'}
+STAMP_FORMAT = '%Y%m%d-%H%M%S'
+STAMP_PATTERN = r'\d{8}-\d{6}'
+
+
+def period_of(period, timestamp):
+    """key of the day, week or month of the time, for example '202405' for May"""
+    return time.strftime(PERIODS[period], time.localtime(timestamp))
+
+
+def segment_path(path, timestamp):
+    """name of the segment of the file, it ends with the time of the rotation"""
+    stem, extension = os.path.splitext(path)
+    name = f'{stem}.{time.strftime(STAMP_FORMAT, time.localtime(timestamp))}{extension}'
+    number = 1
+    while os.path.exists(name) or os.path.exists(f'{name}.gz'):
+        name = f'{stem}.{time.strftime(STAMP_FORMAT, time.localtime(timestamp))}-{number}{extension}'
+        number += 1
+    return name
+
+
+def segments(path):
+    """segments of the file from the oldest, compressed or not"""
+    directory, name = os.path.split(os.path.abspath(path))
+    stem, extension = os.path.splitext(name)
+    pattern = re.compile(rf'{re.escape(stem)}\.({STAMP_PATTERN})(?:-(\d+))?{re.escape(extension)}(\.gz)?')
+    found = {}
+    for item in os.listdir(directory):
+        match = pattern.fullmatch(item)
+        if match is not None:
+            stamp, number, compressed = match.groups()
+            key = (stamp, int(number or 0))
+            # a segment and its archive both exist if compact() was interrupted, the segment is read then
+            if key not in found or not compressed:
+                found[key] = os.path.join(directory, item)
+    return [found[key] for key in sorted(found)]
+
+
+def summarize_lines(lines):
+    """the lines of the file without the pauses and the empty lines, one summary per task"""
+    for line in lines:
+        if line.startswith((b'Task: ', b'Start: ', b'Stop: ', b'The task took: ')):
+            if line.startswith(b'Task: '):
+                yield b'\n'
+            yield line if line.endswith(b'\n') else line + b'\n'
+
+
+def compact_segment(segment):
+    """writes the summary of the segment to segment.gz and removes the segment, returns the new path"""
+    archive = f'{segment}.gz'
+    temporary = f'{archive}.tmp'
+    with open(segment, 'rb') as source, gzip.open(temporary, 'wb') as target:
+        target.writelines(summarize_lines(source))
+    os.replace(temporary, archive)  # the archive appears whole or not at all
+    os.remove(segment)
+    return archive
+
+
+def compact(path, older_than_days=0):
+    """compacts the uncompressed segments of the file older than the number of days"""
+    border = time.time() - older_than_days * 86400
+    return [compact_segment(segment) for segment in segments(path)
+            if not segment.endswith('.gz') and os.path.getmtime(segment) <= border]
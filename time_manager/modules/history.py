@@ -0,0 +1,114 @@
+"""
+The history of the tasks in the main window.
+
+New entries are inserted at the end of the document, the text shown before is not rebuilt,
+so an entry takes the same time at the start and at the end of a long day.
+Only the last max_entries entries are kept. When the user scrolls to the top,
+the older records are read back from the end of the file, page by page.
+"""
+
+import os
+
+from collections import deque
+
+from PyQt5 import QtGui
+from PyQt5.QtWidgets import QTextEdit
+
+
+class HistoryView(QTextEdit):
+    """read-only history with a limited number of entries and paging from the file"""
+
+    def __init__(self, max_entries=500, page_lines=100, parent=None):
+        QTextEdit.__init__(self, parent)
+        self.setReadOnly(True)
+        self.max_entries = max_entries
+        self.page_lines = page_lines  # lines read from the file when the user scrolls to the top
+        self.entries = deque()  # (length in the document, size in bytes in the file) in the order of the document
+
+        self.journal = None  # JournalWriter of the file, see modules/journal.py
+        self.offset = 0  # position in the file of the first entry of the document
+        self.rotations = 0  # rotations of the file when the offset was found
+
+        self.verticalScrollBar().valueChanged.connect(self.scrolled)
+
+    def set_journal(self, journal):
+        """the entries are written to the journal, the older ones are read from it"""
+        self.journal = journal
+        self.rotations = journal.rotations
+        self.offset = os.path.getsize(journal.path) - sum(size for _, size in self.entries)
+        if self.offset > 0:
+            self.load_older()  # the end of the file is shown at once
+
+    def add_entry(self, text):
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.insertText(text)
+        self.entries.append((document_length(text), len(text.encode('utf-8'))))
+
+        while len(self.entries) > self.max_entries:
+            self.remove_first_entry()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def remove_first_entry(self):
+        length, size = self.entries.popleft()
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.setPosition(length, QtGui.QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.offset += size
+
+    def wheelEvent(self, e):
+        # the wheel at the top does not change the scroll bar, for example when the history is short
+        bar = self.verticalScrollBar()
+        if e.angleDelta().y() > 0 and bar.value() == bar.minimum():
+            self.scrolled(bar.value())
+        QTextEdit.wheelEvent(self, e)
+
+    def scrolled(self, value):
+        if value == self.verticalScrollBar().minimum() and self.offset > 0 and self.journal is not None:
+            self.load_older()
+
+    def load_older(self):
+        """inserts at the top the lines of the file before the first entry"""
+        self.journal.flush(sync=False)  # the entries which were removed may still be in the buffer of the journal
+        if self.journal.rotations != self.rotations:
+            self.offset = 0  # the older entries are in a segment now, the history ends here
+            return
+        data = read_lines_before(self.journal.path, self.offset, self.page_lines)
+        if not data:
+            self.offset = 0
+            return
+        text = data.decode('utf-8', 'replace').replace('\r\n', '\n')
+
+        bar = self.verticalScrollBar()
+        value, maximum = bar.value(), bar.maximum()
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.insertText(text)
+        self.entries.appendleft((document_length(text), len(data)))
+        self.offset -= len(data)
+        bar.setValue(value + bar.maximum() - maximum)  # the text which was visible stays in its place
+
+
+def document_length(text):
+    """length of the text in the positions of QTextDocument (UTF-16)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def read_lines_before(path, offset, number, chunk_size=65536):
+    """up to number whole lines of the file which end at the offset"""
+    with open(path, 'rb') as file:
+        start = offset
+        data = b''
+        while start > 0 and data.count(b'\n') <= number:
+            size = min(chunk_size, start)
+            start -= size
+            file.seek(start)
+            data = file.read(size) + data
+            chunk_size *= 2
+    lines = data.split(b'\n')  # the last item is empty, the first one may be a part of a line
+    if start > 0 or len(lines) - 1 > number:
+        lines = lines[-number - 1:]
+    return b'\n'.join(lines)
@@ -0,0 +1,170 @@
+"""
+The file where TimeManager saves the tasks.
+
+JournalWriter keeps the file open for the whole session. The records are collected in memory
+and written by a background thread, so a button press does not wait for the disk.
+When the data reaches the disk is decided by the fsync policy:
+
+    event     every record is written and synced at once
+    interval  the records are written and synced every N milliseconds
+    close     the records are written every N milliseconds and synced only when the file is closed
+
+Every record ends with a line break. When the file is opened, a line cut off by a crash
+is finished with a line break, so the next record starts on its own line; nothing is removed.
+
+The file can be rotated when it grows beyond rotate_size bytes or when a new day, week or month
+begins (rotate_period), the old file becomes a segment, see modules/archive.py.
+"""
+
+import os
+import threading
+import time
+
+from modules.archive import period_of, segment_path
+
+FSYNC_EVENT = 'event'
+FSYNC_INTERVAL = 'interval'
+FSYNC_CLOSE = 'close'
+FSYNC_POLICIES = (FSYNC_EVENT, FSYNC_INTERVAL, FSYNC_CLOSE)
+
+
+def repair(path, chunk_size=65536):
+    """finishes the incomplete last line of the file with a line break, returns its length in bytes
+
+    Nothing is removed: the file may be chosen by the user and edited by hand, so the tail
+    is not always a record of the journal.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r+b') as file:
+        size = end = file.seek(0, os.SEEK_END)
+        complete = 0
+        while end > 0:
+            start = max(end - chunk_size, 0)
+            file.seek(start)
+            position = file.read(end - start).rfind(b'\n')
+            if position >= 0:
+                complete = start + position + 1
+                break
+            end = start
+        if complete < size:
+            file.seek(0, os.SEEK_END)  # the search above stopped somewhere inside the file
+            file.write(b'\n')  # the next record starts on its own line
+        return size - complete
+
+
+class JournalWriter:
+    """appends records to the file from a background thread"""
+
+    def __init__(self, path, fsync_policy=FSYNC_INTERVAL, interval=1000, encoding='utf-8',
+                 rotate_size=None, rotate_period=None):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f'Unknown fsync policy {fsync_policy!r}, expected one of {FSYNC_POLICIES}')
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.interval = interval / 1000  # seconds
+        self.encoding = encoding
+        self.rotate_size = rotate_size  # bytes
+        self.rotate_period = rotate_period  # day, week or month
+
+        self.repaired = repair(path)  # bytes of the line cut off by a crash
+        self.file = open(path, 'ab')
+        # the period of the file is the period of its last change
+        self.period = period_of(rotate_period, os.path.getmtime(path)) if rotate_period else None
+        self.rotations = 0  # the positions in the file are not valid after a rotation
+
+        self.pending = []  # records which are not written yet
+        self.unsynced = False  # records are written, but fsync was not called after them
+        self.error = None  # the last error of the background thread
+        self.closed = False
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name='JournalWriter', daemon=True)
+        self.thread.start()
+
+    def write(self, *records):
+        """adds the records, they are written by the background thread"""
+        if self.closed:
+            raise ValueError('The journal is closed')
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        with self.condition:
+            self.pending.append(''.join(records).encode(self.encoding))
+            if self.fsync_policy == FSYNC_EVENT:
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                # the condition is checked before the wait, so a notify sent while the records
+                # were written is not lost
+                if self.fsync_policy == FSYNC_EVENT:
+                    self.condition.wait_for(lambda: self.pending or self.unsynced or self.closed)
+                else:
+                    self.condition.wait_for(lambda: self.closed, self.interval)
+                closed = self.closed
+            try:
+                self.write_pending(sync=self.fsync_policy != FSYNC_CLOSE or closed)
+            except OSError as error:
+                self.error = error
+                self.unsynced = False  # not retried in a loop, the error is raised by the next write()
+            if closed:
+                break
+
+    def write_pending(self, sync):
+        # the lock keeps the order of the records when flush() is called from the GUI thread
+        with self.write_lock:
+            with self.condition:
+                pending, self.pending = self.pending, []
+            if pending:
+                data = b''.join(pending)
+                if self.must_rotate(len(data)):
+                    self.rotate()
+                self.file.write(data)
+                self.file.flush()
+                self.unsynced = True
+            if sync and self.unsynced:
+                os.fsync(self.file.fileno())
+                self.unsynced = False
+
+    def must_rotate(self, size):
+        if not self.file.tell():
+            return False  # the file is empty
+        if self.rotate_size is not None and self.file.tell() + size > self.rotate_size:
+            return True
+        return self.rotate_period is not None and period_of(self.rotate_period, time.time()) != self.period
+
+    def rotate(self):
+        """the file becomes a segment, the records go to a new file"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.path, segment_path(self.path, time.time()))
+        self.file = open(self.path, 'ab')
+        self.rotations += 1
+        if self.rotate_period:
+            self.period = period_of(self.rotate_period, time.time())
+
+    def flush(self, sync=True):
+        """writes everything added before, without waiting for the background thread.
+
+        Without sync the records reach the file but not necessarily the disk, which is enough
+        to read them back, and the GUI thread does not wait for fsync."""
+        self.write_pending(sync=sync and self.fsync_policy != FSYNC_CLOSE)
+        if not sync and self.fsync_policy == FSYNC_EVENT:
+            with self.condition:
+                self.condition.notify()  # the background thread syncs the records at once
+
+    def close(self):
+        """writes the rest of the records and syncs the file"""
+        if self.closed:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
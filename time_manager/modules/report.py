@@ -0,0 +1,256 @@
+"""
+Reports over the .doc/.txt files of TimeManager.
+
+The files are read in chunks of whole lines through a pipeline of generators,
+so a file of any size takes the same memory:
+
+    read_chunks -> parse_tasks -> aggregate
+
+The totals are counted per task, per day and per week (ISO weeks, '2024-W05').
+ReportThread runs the pipeline outside the GUI thread and reports the progress in percent.
+"""
+
+import gzip
+import os
+import re
+import time
+import zlib
+
+from collections import defaultdict
+from datetime import datetime
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QProgressBar, QLabel, QTabWidget,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog)
+
+NO_NAME = '# ---'  # the task without a name
+
+# the lines which matter for the report, the lines of the pauses are skipped by the regular expression
+LINE_PATTERN = re.compile(rb'^(?:Task: ([^\r\n]*)'
+                          rb'|Start: (\d\d\.\d\d\.\d{4})'
+                          rb'|The task took: hours=(\d+) minutes=(\d+) seconds=([\d.]+))', re.MULTILINE)
+
+
+def read_chunks(paths, progress=None, chunk_size=2 ** 20):
+    """the files (.gz too) in chunks of whole lines, progress(read bytes, all bytes) is called after every chunk.
+
+    A small chunk is parsed quickly, so the GUI thread does not wait long for the GIL."""
+    total = sum(os.path.getsize(path) for path in paths)
+    done = 0
+    for path in paths:
+        with open(path, 'rb') as raw:
+            # the compressed segments (see modules/archive.py) are read in the same way
+            file = gzip.GzipFile(fileobj=raw) if path.endswith('.gz') else raw
+            start = done
+            rest = b''
+            while True:
+                data = file.read(chunk_size)
+                if not data:
+                    break
+                done = start + raw.tell()  # the progress is counted in the bytes of the file on the disk
+                end = data.rfind(b'\n') + 1
+                if end:
+                    yield rest + data[:end]
+                    rest = data[end:]
+                else:
+                    rest += data
+                if progress is not None:
+                    progress(done, total)
+            if rest:
+                yield rest
+    if progress is not None:
+        progress(done, total)
+
+
+def parse_tasks(chunks):
+    """(name, day of the start, seconds) of every completed task, the day is b'dd.mm.yyyy'"""
+    name = NO_NAME
+    day = None
+    for chunk in chunks:
+        for task, start, hours, minutes, seconds in LINE_PATTERN.findall(chunk):
+            if hours:
+                if day is not None:
+                    yield name, day, int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+                name, day = NO_NAME, None
+            elif start:
+                day = start
+            else:
+                name = task.decode('utf-8', 'replace') or NO_NAME
+
+
+def week_of(day):
+    year, week, _ = day.isocalendar()
+    return f'{year}-W{week:02}'
+
+
+class Report:
+    """seconds of work per task, per day and per week"""
+
+    def __init__(self):
+        self.tasks = defaultdict(float)
+        self.days = defaultdict(float)  # b'dd.mm.yyyy' of the file, after summarize() 'yyyy-mm-dd'
+        self.weeks = {}
+        self.count = 0  # number of tasks
+
+    def summarize(self):
+        """converts the days of the file to ISO dates and counts the weeks, damaged dates are skipped"""
+        days = defaultdict(float)
+        weeks = defaultdict(float)
+        for day, seconds in self.days.items():
+            try:
+                day = datetime.strptime(day.decode('ascii'), '%d.%m.%Y').date()
+            except ValueError:
+                continue
+            days[day.isoformat()] += seconds
+            weeks[week_of(day)] += seconds
+        self.tasks, self.days, self.weeks = dict(self.tasks), dict(days), dict(weeks)
+        return self
+
+
+def aggregate(tasks, report=None):
+    report = Report() if report is None else report
+    by_task, by_day = report.tasks, report.days
+    count = 0
+    for name, day, seconds in tasks:
+        by_task[name] += seconds
+        by_day[day] += seconds
+        count += 1
+    report.count += count
+    return report
+
+
+def make_report(paths, progress=None):
+    return aggregate(parse_tasks(read_chunks(paths, progress))).summarize()
+
+
+def hours_text(seconds):
+    hours, seconds = divmod(round(seconds), 3600)
+    return f'{hours}:{seconds // 60:02}:{seconds % 60:02}'
+
+
+class Interrupted(Exception):
+    pass
+
+
+class ReportThread(QtCore.QThread):
+    """makes the report outside the GUI thread"""
+
+    progress = QtCore.pyqtSignal(int)  # percent
+    ready = QtCore.pyqtSignal(object, float)  # report, seconds of work
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, paths, parent=None):
+        QtCore.QThread.__init__(self, parent)
+        self.paths = list(paths)
+
+    def report_progress(self, done, total):
+        if self.isInterruptionRequested():
+            raise Interrupted()
+        self.progress.emit(done * 100 // total if total else 100)
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            report = make_report(self.paths, self.report_progress)
+        except Interrupted:
+            return
+        except (OSError, EOFError, zlib.error) as error:  # a truncated or broken .gz segment is not an OSError
+            self.failed.emit(str(error) or type(error).__name__)
+        else:
+            self.ready.emit(report, time.perf_counter() - start)
+
+
+class TimeItem(QTableWidgetItem):
+    """cell with the time, sorted by the seconds instead of the text"""
+
+    def __init__(self, seconds):
+        QTableWidgetItem.__init__(self, hours_text(seconds))
+        self.seconds = seconds
+
+    def __lt__(self, other):
+        if isinstance(other, TimeItem):
+            return self.seconds < other.seconds
+        return QTableWidgetItem.__lt__(self, other)
+
+
+class ReportWindow(QWidget):
+    """window with the time spent per task, per day and per week"""
+
+    def __init__(self, paths=(), parent=None):
+        QWidget.__init__(self, parent, QtCore.Qt.Window)
+        self.setWindowTitle('Report')
+        self.setWindowIcon(QtGui.QIcon(r"images/clock.png"))
+        self.resize(450, 500)
+        self.report_thread = None
+
+        self.btn_open = QPushButton('Open files')
+        self.btn_open.clicked.connect(self.clc_btn_open)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.top_box = QHBoxLayout()
+        self.top_box.addWidget(self.btn_open)
+        self.top_box.addWidget(self.progress_bar)
+
+        self.tabs = QTabWidget()
+        self.tables = {}
+        for title in ('Tasks', 'Days', 'Weeks'):
+            table = QTableWidget(0, 2)
+            table.setHorizontalHeaderLabels((title[:-1], 'Time'))
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            table.setSortingEnabled(True)
+            self.tables[title] = table
+            self.tabs.addTab(table, title)
+
+        self.status = QLabel()
+        self.status.setAlignment(QtCore.Qt.AlignRight)
+
+        self.main_box = QVBoxLayout()
+        self.main_box.addLayout(self.top_box)
+        self.main_box.addWidget(self.tabs)
+        self.main_box.addWidget(self.status)
+        self.setLayout(self.main_box)
+
+        if paths:
+            self.start(paths)
+
+    @QtCore.pyqtSlot()
+    def clc_btn_open(self):
+        paths = QFileDialog.getOpenFileNames(self, filter="Files (*.doc *.txt *.gz)")[0]
+        if paths:
+            self.start(paths)
+
+    def start(self, paths):
+        self.stop()
+        self.progress_bar.setValue(0)
+        self.status.setText('Reading...')
+        self.report_thread = ReportThread(paths, self)
+        self.report_thread.progress.connect(self.progress_bar.setValue)
+        self.report_thread.ready.connect(self.show_report)
+        self.report_thread.failed.connect(self.status.setText)
+        self.report_thread.start()
+
+    def stop(self):
+        if self.report_thread is not None:
+            self.report_thread.requestInterruption()
+            self.report_thread.wait()
+            self.report_thread = None
+
+    def show_report(self, report, seconds):
+        self.fill(self.tables['Tasks'], report.tasks)
+        self.fill(self.tables['Days'], report.days)
+        self.fill(self.tables['Weeks'], report.weeks)
+        self.status.setText(f'{report.count} tasks in {seconds:.1f} s')
+
+    @staticmethod
+    def fill(table, totals):
+        table.setSortingEnabled(False)
+        table.setRowCount(len(totals))
+        for row, (key, seconds) in enumerate(sorted(totals.items())):
+            table.setItem(row, 0, QTableWidgetItem(key))
+            table.setItem(row, 1, TimeItem(seconds))
+        table.setSortingEnabled(True)
+
+    def closeEvent(self, e):
+        self.stop()
+        QWidget.closeEvent(self, e)
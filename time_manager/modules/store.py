@@ -0,0 +1,144 @@
+"""
+The database of the tasks of TimeManager (SQLite in WAL mode).
+
+    tasks   one row per task: name, day, the time of the start and the stop, seconds of work
+    events  one row per press of Start, Pause and Stop
+
+The tasks are indexed by name and by day, so the time spent on a task in a period
+is found without reading the whole history. The text files of the old versions
+can be made from the database with export_text.
+"""
+
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.time_manager', 'sessions.sqlite3')
+
+START = 'start'
+PAUSE = 'pause'
+RESUME = 'resume'
+STOP = 'stop'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,  -- YYYY-MM-DD of the start, local time
+    started REAL NOT NULL,  -- seconds since the epoch
+    stopped REAL,
+    seconds REAL  -- time of work without the pauses
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES tasks (id),
+    kind TEXT NOT NULL,  -- start, pause, resume or stop
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_name_day ON tasks (name, day);
+CREATE INDEX IF NOT EXISTS tasks_day ON tasks (day);
+CREATE INDEX IF NOT EXISTS events_task ON events (task_id);
+'''
+
+
+def day_of(timestamp):
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+def text_time(timestamp):
+    """time in the format of the text files"""
+    return time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))
+
+
+def duration_text(seconds):
+    """'The task took: ...' line of the text files"""
+    hours = round(seconds // 3600)
+    minutes = round((seconds - hours * 3600) // 60)
+    seconds = round(seconds - hours * 3600 - minutes * 60, 2)
+    return f'The task took: {hours=} {minutes=} {seconds=}\n\n'
+
+
+class SessionStore:
+    """tasks and their events in an SQLite database"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')  # WAL stays consistent, the commit does not wait for fsync
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def start_task(self, name, timestamp):
+        """new task, returns its id"""
+        with self.connection:
+            task_id = self.connection.execute('INSERT INTO tasks (name, day, started) VALUES (?, ?, ?)',
+                                              (name, day_of(timestamp), timestamp)).lastrowid
+            self.connection.execute('INSERT INTO events (task_id, kind, time) VALUES (?, ?, ?)',
+                                    (task_id, START, timestamp))
+        return task_id
+
+    def add_event(self, task_id, kind, timestamp):
+        with self.connection:
+            self.connection.execute('INSERT INTO events (task_id, kind, time) VALUES (?, ?, ?)',
+                                    (task_id, kind, timestamp))
+
+    def stop_task(self, task_id, timestamp, seconds):
+        with self.connection:
+            self.connection.execute('INSERT INTO events (task_id, kind, time) VALUES (?, ?, ?)',
+                                    (task_id, STOP, timestamp))
+            self.connection.execute('UPDATE tasks SET stopped = ?, seconds = ? WHERE id = ?',
+                                    (timestamp, seconds, task_id))
+
+    def total_seconds(self, name, first_day=None, last_day=None):
+        """time spent on the task, the days are 'YYYY-MM-DD' and both are included"""
+        query = 'SELECT COALESCE(SUM(seconds), 0) FROM tasks WHERE name = ?'
+        parameters = [name]
+        query, parameters = self.days_condition(query, parameters, first_day, last_day)
+        return self.connection.execute(query, parameters).fetchone()[0]
+
+    def totals(self, first_day=None, last_day=None):
+        """[(task name, seconds)] of the period, the longest tasks first"""
+        query = 'SELECT name, SUM(seconds) FROM tasks WHERE seconds IS NOT NULL'
+        query, parameters = self.days_condition(query, [], first_day, last_day)
+        query += ' GROUP BY name ORDER BY 2 DESC'
+        return self.connection.execute(query, parameters).fetchall()
+
+    @staticmethod
+    def days_condition(query, parameters, first_day, last_day):
+        if first_day is not None:
+            query += ' AND day >= ?'
+            parameters.append(first_day)
+        if last_day is not None:
+            query += ' AND day <= ?'
+            parameters.append(last_day)
+        return query, parameters
+
+    def export_text(self, path, first_day=None, last_day=None):
+        """writes the stopped tasks of the period in the format of the text files, returns the number of tasks"""
+        query = 'SELECT id, name, seconds FROM tasks WHERE seconds IS NOT NULL'
+        query, parameters = self.days_condition(query, [], first_day, last_day)
+        query += ' ORDER BY started'
+        count = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            for task_id, name, seconds in self.connection.execute(query, parameters).fetchall():
+                file.write(f'\nTask: {name}\n\n' if name else 'Task: # ---\n\n')
+                for kind, timestamp in self.connection.execute(
+                        'SELECT kind, time FROM events WHERE task_id = ? ORDER BY id', (task_id,)):
+                    if kind == START:
+                        file.write(f'Start: {text_time(timestamp)}\n')
+                    elif kind == PAUSE:
+                        file.write(f'Pause/Stop: {text_time(timestamp)}\n')
+                    elif kind == RESUME:
+                        file.write(f'Pause/Start: {text_time(timestamp)}\n')
+                    else:
+                        file.write(f'Stop: {text_time(timestamp)}\n\n')
+                file.write(duration_text(seconds))
+                count += 1
+        return count
+
+    def close(self):
+        self.connection.close()
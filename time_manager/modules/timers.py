@@ -0,0 +1,267 @@
+"""
+Many task timers in one window.
+
+The state of the timers is kept in arrays, one item per timer:
+
+    elapsed   nanoseconds of work before the last start
+    started   time.monotonic_ns() of the last start, 0 while the timer is paused
+    wall      time.time() of the first start, for the file and the database
+    task_ids  id of the task in the database, -1 without the database
+
+The table shows the timers through a model. One QTimer for all the timers
+asks the view to repaint only the rows which are visible.
+"""
+
+import time
+
+from array import array
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTableView, QHeaderView,
+                             QAbstractItemView, QLabel)
+
+from modules.report import hours_text
+from modules.store import PAUSE, RESUME, duration_text, text_time
+
+NAME, TIME, STATE = range(3)
+
+
+class TimerTable:
+    """independent timers of tasks"""
+
+    def __init__(self):
+        self.names = []
+        self.elapsed = array('q')
+        self.started = array('q')
+        self.wall = array('d')
+        self.task_ids = array('q')
+        self.running = 0  # number of running timers
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        """new paused timer, returns its row"""
+        self.names.append(name)
+        self.elapsed.append(0)
+        self.started.append(0)
+        self.wall.append(0.0)
+        self.task_ids.append(-1)
+        return len(self.names) - 1
+
+    def is_running(self, row):
+        return self.started[row] != 0
+
+    def start(self, row, now=None):
+        if not self.is_running(row):
+            self.started[row] = time.monotonic_ns() if now is None else now
+            self.running += 1
+
+    def pause(self, row, now=None):
+        if self.is_running(row):
+            now = time.monotonic_ns() if now is None else now
+            self.elapsed[row] += now - self.started[row]
+            self.started[row] = 0
+            self.running -= 1
+
+    def elapsed_ns(self, row, now=None):
+        if self.is_running(row):
+            return self.elapsed[row] + (time.monotonic_ns() if now is None else now) - self.started[row]
+        return self.elapsed[row]
+
+    def remove(self, row):
+        """removes the timer, returns (name, elapsed nanoseconds, time of the first start, task id)"""
+        self.pause(row)
+        removed = self.names[row], self.elapsed[row], self.wall[row], self.task_ids[row]
+        del self.names[row]
+        for column in (self.elapsed, self.started, self.wall, self.task_ids):
+            del column[row]
+        return removed
+
+
+class TimersModel(QtCore.QAbstractTableModel):
+    """the timers as a table: task, time, state"""
+
+    headers = ('Task', 'Time', 'State')
+
+    def __init__(self, timers, parent=None):
+        QtCore.QAbstractTableModel.__init__(self, parent)
+        self.timers = timers
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.timers)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        row, column = index.row(), index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == NAME:
+                return self.timers.names[row] or '# ---'
+            if column == TIME:
+                return hours_text(self.timers.elapsed_ns(row) / 1e9)
+            return 'running' if self.timers.is_running(row) else 'paused'
+        if role == QtCore.Qt.BackgroundRole and column == STATE:
+            return QtGui.QColor(0, 255, 0) if self.timers.is_running(row) else QtGui.QColor(255, 255, 0)
+        if role == QtCore.Qt.TextAlignmentRole and column != NAME:
+            return QtCore.Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def add(self, name):
+        row = len(self.timers)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.timers.add(name)
+        self.endInsertRows()
+        return row
+
+    def remove(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        removed = self.timers.remove(row)
+        self.endRemoveRows()
+        return removed
+
+    def rows_changed(self, first, last, columns=(TIME, STATE)):
+        self.dataChanged.emit(self.index(first, columns[0]), self.index(last, columns[-1]))
+
+
+class TimersWindow(QWidget):
+    """window with the timers of many tasks, the stopped tasks are saved like in the main window"""
+
+    def __init__(self, store=None, write=None, refresh_interval=1000, parent=None):
+        QWidget.__init__(self, parent, QtCore.Qt.Window)
+        self.setWindowTitle('Timers')
+        self.setWindowIcon(QtGui.QIcon(r"images/clock.png"))
+        self.resize(450, 500)
+        self.store = store  # SessionStore, see modules/store.py
+        self.write = write  # function which writes the records to the file
+
+        self.timers = TimerTable()
+        self.model = TimersModel(self.timers, self)
+
+        self.text_task = QLineEdit()
+        self.text_task.setPlaceholderText('Name of the task')
+        self.text_task.returnPressed.connect(self.clc_btn_add)
+        self.btn_add = QPushButton('Add')
+        self.btn_add.clicked.connect(self.clc_btn_add)
+        self.add_box = QHBoxLayout()
+        self.add_box.addWidget(self.text_task)
+        self.add_box.addWidget(self.btn_add)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(NAME, QHeaderView.Stretch)
+        self.table.setToolTip('<center>Double click starts or pauses the timer</center>')
+        self.table.doubleClicked.connect(lambda index: self.toggle([index.row()]))
+
+        self.btn_start_pause = QPushButton('Start/Pause')
+        self.btn_start_pause.setStyleSheet("background-color: rgb(255, 255, 0)")
+        self.btn_start_pause.clicked.connect(lambda: self.toggle(self.selected_rows()))
+        self.btn_stop = QPushButton('Stop')
+        self.btn_stop.setStyleSheet("background-color: rgb(255, 0, 0)")
+        self.btn_stop.clicked.connect(self.clc_btn_stop)
+        self.buttons = QHBoxLayout()
+        self.buttons.addWidget(self.btn_start_pause)
+        self.buttons.addWidget(self.btn_stop)
+
+        self.status = QLabel()
+        self.status.setAlignment(QtCore.Qt.AlignRight)
+
+        # one timer for all the tasks, it works only while a task runs and the window is visible
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setTimerType(QtCore.Qt.CoarseTimer)
+        self.refresh_timer.setInterval(refresh_interval)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.main_box = QVBoxLayout()
+        self.main_box.addLayout(self.add_box)
+        self.main_box.addWidget(self.table)
+        self.main_box.addLayout(self.buttons)
+        self.main_box.addWidget(self.status)
+        self.setLayout(self.main_box)
+        self.show_status()
+
+    def selected_rows(self):
+        return sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+
+    @QtCore.pyqtSlot()
+    def clc_btn_add(self):
+        row = self.model.add(self.text_task.text().strip())
+        self.text_task.clear()
+        self.toggle([row])
+        self.table.selectRow(row)
+
+    def toggle(self, rows):
+        """starts the paused timers and pauses the running ones"""
+        now = time.monotonic_ns()
+        wall = time.time()
+        for row in rows:
+            if self.timers.is_running(row):
+                self.timers.pause(row, now)
+                self.save_event(row, PAUSE, wall)
+            else:
+                self.timers.start(row, now)
+                if self.timers.wall[row] == 0.0:
+                    self.timers.wall[row] = wall
+                    if self.store is not None:
+                        self.timers.task_ids[row] = self.store.start_task(self.timers.names[row], wall)
+                else:
+                    self.save_event(row, RESUME, wall)
+            self.model.rows_changed(row, row)
+        self.update_refresh_timer()
+
+    def save_event(self, row, kind, wall):
+        if self.store is not None and self.timers.task_ids[row] >= 0:
+            self.store.add_event(self.timers.task_ids[row], kind, wall)
+
+    @QtCore.pyqtSlot()
+    def clc_btn_stop(self):
+        wall = time.time()
+        for row in reversed(self.selected_rows()):
+            name, elapsed, started, task_id = self.model.remove(row)
+            if not started:
+                continue  # the timer was never started
+            seconds = elapsed / 1e9
+            if self.store is not None and task_id >= 0:
+                self.store.stop_task(task_id, wall, seconds)
+            if self.write is not None:
+                self.write(f'\nTask: {name}\n\n' if name else 'Task: # ---\n\n',
+                           f'Start: {text_time(started)}\n', f'Stop: {text_time(wall)}\n\n', duration_text(seconds))
+        self.update_refresh_timer()
+
+    def stop_all(self):
+        self.table.selectAll()
+        self.clc_btn_stop()
+
+    @QtCore.pyqtSlot()
+    def refresh(self):
+        """repaints the time of the visible rows"""
+        first = self.table.rowAt(0)
+        if first < 0:
+            return
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = len(self.timers) - 1
+        self.model.rows_changed(first, last, (TIME, TIME))
+
+    def update_refresh_timer(self):
+        if self.timers.running and self.isVisible() and not self.isMinimized():
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+        self.show_status()
+
+    def show_status(self):
+        self.status.setText(f'{self.timers.running} of {len(self.timers)} running')
+
+    def event(self, e):
+        if e.type() in (QtCore.QEvent.Show, QtCore.QEvent.Hide, QtCore.QEvent.WindowStateChange):
+            self.update_refresh_timer()
+        return QWidget.event(self, e)  # send farther
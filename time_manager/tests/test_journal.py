@@ -0,0 +1,58 @@
+"""
+The repair of the data file when it is opened (modules/journal.py).
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.journal import repair  # noqa: E402
+
+
+class RepairTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tasks.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def repaired(self, data, chunk_size=65536):
+        with open(self.path, 'wb') as file:
+            file.write(data)
+        removed = repair(self.path, chunk_size)
+        with open(self.path, 'rb') as file:
+            return removed, file.read()
+
+    def test_complete_file_is_not_changed(self):
+        self.assertEqual(self.repaired(b'Task: a\nStart: 1\n'), (0, b'Task: a\nStart: 1\n'))
+
+    def test_cut_line_is_finished(self):
+        self.assertEqual(self.repaired(b'Task: a\nSta'), (3, b'Task: a\nSta\n'))
+
+    def test_cut_line_longer_than_chunk(self):
+        head = b'Task: a\n'
+        tail = bytes(range(1, 10)) * 11111  # no line break, 99 999 bytes
+        removed, data = self.repaired(head + tail, chunk_size=65536)
+        self.assertEqual(removed, len(tail))
+        self.assertTrue(data == head + tail + b'\n', 'the line break must be added at the end')
+
+    def test_file_without_line_breaks(self):
+        binary = b'\x00\xd0\xcf' * 40000
+        removed, data = self.repaired(binary, chunk_size=65536)
+        self.assertEqual(removed, len(binary))
+        self.assertTrue(data == binary + b'\n', 'the line break must be added at the end')
+
+    def test_missing_file(self):
+        self.assertEqual(repair(self.path), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,7 +11,14 @@ import time
 
 from PyQt5 import QtCore, QtGui
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, QLabel, QRadioButton, QGroupBox,
-                             QHBoxLayout, qApp, QLineEdit, QFileDialog, QMessageBox, QTextEdit)
+                             QHBoxLayout, QLineEdit, QFileDialog, QMessageBox, QTextEdit)
+
+from modules.archive import segments
+from modules.history import HistoryView
+from modules.journal import JournalWriter, FSYNC_INTERVAL
+from modules.report import ReportWindow, hours_text
+from modules.timers import TimersWindow
+from modules.store import SessionStore, DEFAULT_PATH as DEFAULT_STORE_PATH, PAUSE, RESUME, duration_text
 
 
 class Button(QPushButton):
@@ -55,6 +62,8 @@ class Question(BaseWindow):
 
     """In class Question user survey windows are implemented regarding the choice of a file to save data"""
 
+    selected = QtCore.pyqtSignal(str)  # the text of the chosen answer
+
     def __init__(self, label_rbtn_1: str, label_rbtn_2: str, label_group_box: str, parent=None):
         BaseWindow.__init__(self, parent)
         self.setMinimumSize(300, 150)
@@ -109,8 +118,10 @@ class Question(BaseWindow):
     def clc_btn_select(self):
         if self.rbtn_1.isChecked():
             self.check_value = self.rbtn_1.text()
+            self.selected.emit(self.check_value)
         elif self.rbtn_2.isChecked():
             self.check_value = self.rbtn_2.text()
+            self.selected.emit(self.check_value)
 
 
 class NamedFile(BaseWindow):
@@ -121,6 +132,8 @@ class NamedFile(BaseWindow):
 
     valid_symbols = f'{ascii_letters}{digits}_'
 
+    entered = QtCore.pyqtSignal(str)  # the valid file name
+
     def __init__(self, parent=None):
         BaseWindow.__init__(self, parent)
         self.setWindowFlags(QtCore.Qt.CustomizeWindowHint | QtCore.Qt.WindowTitleHint)
@@ -162,6 +175,7 @@ class NamedFile(BaseWindow):
         verification_result = self.is_valid_symbols(self.file_name)
         if verification_result is None:
             self.valid_file_name = self.file_name
+            self.entered.emit(self.valid_file_name)  # the next window is shown before this one is closed
             self.close()
         elif verification_result:
             self.message.setText(f'<center>The {verification_result} symbol cannot be used</center>')
@@ -182,21 +196,30 @@ class TimeManager(BaseWindow):
 
     """class TimeManager implements the main application window and program execution logic"""
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, fsync_policy=FSYNC_INTERVAL, fsync_interval=1000, store_path=DEFAULT_STORE_PATH,
+                 elapsed_interval=1000, rotate_size=None, rotate_period=None):
         BaseWindow.__init__(self, parent)
         self.resize(500, 200)
         self.setMaximumWidth(700)
         self.setMaximumHeight(500)
 
         self.path_file = None
-        self.history = []
-        self.time_spent_task = []
+        self.journal = None  # writes the tasks to self.path_file, see modules/journal.py
+        self.fsync_policy = fsync_policy  # event, interval or close
+        self.fsync_interval = fsync_interval  # milliseconds
+        self.rotate_size = rotate_size  # the file becomes a segment when it is bigger (bytes)
+        self.rotate_period = rotate_period  # or when a new day, week or month begins
+        self.store = SessionStore(store_path) if store_path else None  # database of all the tasks
+        self.task_id = None  # id of the current task in the database
+        self.report_window = None
+        self.timers_window = None  # timers of many tasks at the same time
+        self.time_spent_task = []  # time.monotonic_ns() of the presses of the current task
+        self.wall_time = None  # time.time() of the last press, it is only displayed and saved
         self.last_pressed_btn = None
 
         self.question = Question('Yes', 'No', 'Do you want to save the data to a file?')
 
-        self.history_tasks = QTextEdit('')  # create window to display history of tasks
-        self.history_tasks.setReadOnly(True)
+        self.history_tasks = HistoryView()  # create window to display history of tasks
         self.history_tasks.setLineWrapMode(QTextEdit.WidgetWidth)
         self.history_tasks.setToolTip('''<center>Display the history of the tasks</center>''')
 
@@ -222,8 +245,25 @@ class TimeManager(BaseWindow):
         self.task = QHBoxLayout()
         self.label_task = QLabel('Enter the name of the task: ')
         self.text_task = QLineEdit()
+        self.btn_report = QPushButton('Report')
+        self.btn_report.setToolTip('<center>Time per task, day and week from the saved files</center>')
+        self.btn_report.clicked.connect(self.clc_btn_report)
         self.task.addWidget(self.label_task)
         self.task.addWidget(self.text_task)
+        self.btn_timers = QPushButton('Timers')
+        self.btn_timers.setToolTip('<center>Timers of many tasks at the same time</center>')
+        self.btn_timers.clicked.connect(self.clc_btn_timers)
+        self.task.addWidget(self.btn_report)
+        self.task.addWidget(self.btn_timers)
+
+        # time of work on the current task, it is updated only while the task runs and the window is visible
+        self.label_elapsed = QLabel(hours_text(0))
+        self.label_elapsed.setToolTip('<center>Time of work on the task without the pauses</center>')
+        self.task.insertWidget(2, self.label_elapsed)
+        self.elapsed_timer = QtCore.QTimer(self)
+        self.elapsed_timer.setTimerType(QtCore.Qt.CoarseTimer)  # the system may join it with other timers
+        self.elapsed_timer.setInterval(elapsed_interval)
+        self.elapsed_timer.timeout.connect(self.show_elapsed)
 
         self.main_box.addWidget(self.history_tasks, QtCore.Qt.AlignBottom)
         self.main_box.addLayout(self.buttons, QtCore.Qt.AlignBottom)
@@ -231,15 +271,59 @@ class TimeManager(BaseWindow):
 
         self.move_center_display()
 
+        self.name_file = None  # window to enter the name of the created file
+
         self.run_questions()
 
+    def open_journal(self):
+        if self.path_file:
+            self.journal = JournalWriter(self.path_file, self.fsync_policy, self.fsync_interval,
+                                         rotate_size=self.rotate_size, rotate_period=self.rotate_period)
+            self.history_tasks.set_journal(self.journal)
+            if self.journal.repaired:
+                QMessageBox.information(self, 'TimeManager',
+                                        f'<center>The last line of {self.path_file} was not complete '
+                                        f'({self.journal.repaired} bytes), probably after a crash.</center>'
+                                        f'<center>A line break was added after it, nothing was removed.</center>')
+
+    def write_to_file(self, *records):
+        if self.journal is not None:
+            self.journal.write(*records)
+
+    def write_records(self, *records):
+        """the records of the timers are shown in the history too, its offsets in the file stay right"""
+        for record in records:
+            self.history_tasks.add_entry(record)
+        self.write_to_file(*records)
+
     def make_a_time_stamp(self):
-        mark_time = time.time()
-        struct = time.localtime(mark_time)
+        # the durations are measured with the monotonic clock, it does not jump with NTP and DST
+        self.time_spent_task.append(time.monotonic_ns())
+        self.wall_time = time.time()
+        struct = time.localtime(self.wall_time)
         output_mark_time = time.strftime('%d.%m.%Y %H:%M', struct)
-        self.time_spent_task.append(mark_time)
         return output_mark_time
 
+    def task_elapsed_ns(self):
+        """time of work on the current task without the pauses"""
+        stamps = self.time_spent_task
+        elapsed = sum(stamps[i + 1] - stamps[i] for i in range(0, len(stamps) - 1, 2))
+        if len(stamps) % 2:
+            elapsed += time.monotonic_ns() - stamps[-1]  # the task runs now
+        return elapsed
+
+    @QtCore.pyqtSlot()
+    def show_elapsed(self):
+        self.label_elapsed.setText(hours_text(self.task_elapsed_ns() / 1e9))
+
+    def update_elapsed_timer(self):
+        running = len(self.time_spent_task) % 2 == 1
+        if running and self.isVisible() and not self.isMinimized():
+            self.show_elapsed()
+            self.elapsed_timer.start()
+        else:
+            self.elapsed_timer.stop()
+
     @QtCore.pyqtSlot()
     def clc_btn_start(self):
         self.last_pressed_btn = 'Start'
@@ -254,16 +338,15 @@ class TimeManager(BaseWindow):
         self.text_task.setReadOnly(True)
 
         name_task = f'\nTask: {task}\n\n' if task else f'Task: # ---\n\n'
-        self.history.append(name_task)
+        self.history_tasks.add_entry(name_task)
 
         start_text = f'Start: {start_task}\n'
-        self.history.append(start_text)
-        self.history_tasks.setText(''.join(self.history))
+        self.history_tasks.add_entry(start_text)
 
-        if self.path_file:
-            with open(self.path_file, 'a+') as file:
-                file.write(name_task)
-                file.write(start_text)
+        self.write_to_file(name_task, start_text)
+        if self.store is not None:
+            self.task_id = self.store.start_task(task, self.wall_time)
+        self.update_elapsed_timer()
 
     @QtCore.pyqtSlot()
     def clc_btn_pause(self):
@@ -271,14 +354,16 @@ class TimeManager(BaseWindow):
 
         pause_task = self.make_a_time_stamp()
 
-        head = 'Pause/Stop' if len(self.history) % 2 == 0 else 'Pause/Start'
+        head = 'Pause/Stop' if len(self.time_spent_task) % 2 == 0 else 'Pause/Start'
         pause_text = f'{head}: {pause_task}\n'
-        self.history.append(pause_text)
-        self.history_tasks.setText(''.join(self.history))
+        self.history_tasks.add_entry(pause_text)
 
-        if self.path_file:
-            with open(self.path_file, 'a+') as file:
-                file.write(pause_text)
+        self.write_to_file(pause_text)
+        if self.store is not None:
+            kind = PAUSE if len(self.time_spent_task) % 2 == 0 else RESUME
+            self.store.add_event(self.task_id, kind, self.wall_time)
+        self.update_elapsed_timer()
+        self.show_elapsed()
 
     @QtCore.pyqtSlot()
     def clc_btn_stop(self):
@@ -293,25 +378,42 @@ class TimeManager(BaseWindow):
         self.text_task.setReadOnly(False)
         self.text_task.clear()
         stop_text = f'Stop: {stop_task}\n\n'
-        self.history.append(stop_text)
+        self.history_tasks.add_entry(stop_text)
 
         if len(self.time_spent_task) % 2 != 0:
             self.time_spent_task = self.time_spent_task[:-1]
 
-        all_time_task_seconds = sum([i - j for i, j in zip(self.time_spent_task[-1::-2], self.time_spent_task[-2::-2])])
-        hours = round(all_time_task_seconds // 3600)
-        minutes = round((all_time_task_seconds - hours * 3600) // 60)
-        seconds = round(all_time_task_seconds - hours * 3600 - minutes * 60, 2)
-        all_time_text = f'The task took: {hours=} {minutes=} {seconds=}\n\n'
-        self.history.append(all_time_text)
-        self.history_tasks.setText(''.join(self.history))
+        all_time_task_seconds = self.task_elapsed_ns() / 1e9
+        all_time_text = duration_text(all_time_task_seconds)
+        self.history_tasks.add_entry(all_time_text)
 
-        if self.path_file:
-            with open(self.path_file, 'a+') as file:
-                file.write(stop_text)
-                file.write(all_time_text)
+        self.write_to_file(stop_text, all_time_text)
+        if self.store is not None and self.task_id is not None:
+            self.store.stop_task(self.task_id, self.wall_time, all_time_task_seconds)
+            self.task_id = None
 
+        self.show_elapsed()
         self.time_spent_task = []
+        self.update_elapsed_timer()
+
+    @QtCore.pyqtSlot()
+    def clc_btn_report(self):
+        if self.report_window is None:
+            self.report_window = ReportWindow(parent=self)
+        if self.path_file:
+            # the report is made again every time, the file has grown since the last one
+            if self.journal is not None:
+                self.journal.flush(sync=False)  # the report reads the file, the disk is not needed
+            self.report_window.start(segments(self.path_file) + [self.path_file])
+        self.report_window.show()
+        self.report_window.activateWindow()
+
+    @QtCore.pyqtSlot()
+    def clc_btn_timers(self):
+        if self.timers_window is None:
+            self.timers_window = TimersWindow(self.store, self.write_records, parent=self)
+        self.timers_window.show()
+        self.timers_window.activateWindow()
 
     def event(self, e):
 
@@ -324,6 +426,15 @@ class TimeManager(BaseWindow):
         elif e.type() == QtCore.QEvent.Close:
             if self.last_pressed_btn != 'Stop':
                 self.clc_btn_stop()
+            if self.timers_window is not None:
+                self.timers_window.stop_all()  # the running tasks are saved
+            if self.journal is not None:
+                self.journal.close()
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+            if self.report_window is not None:
+                self.report_window.stop()
 
             self.setVisible(False)
             message = '<center>Goodbye!</center>\n'
@@ -332,54 +443,53 @@ class TimeManager(BaseWindow):
             last_window = QMessageBox(QMessageBox.NoIcon, f'{" " * 10}TimeManager{" " * 10}',
                                       message, buttons=QMessageBox.NoButton, parent=self)
             last_window.exec_()
+
+        elif e.type() in (QtCore.QEvent.Show, QtCore.QEvent.Hide, QtCore.QEvent.WindowStateChange):
+            self.update_elapsed_timer()  # the counter does not tick while the window is hidden or minimized
         return QWidget.event(self, e)  # send farther
 
     def run_questions(self):
+        """the questions are answered through signals, the program waits for them in the event loop"""
+        self.question.selected.connect(self.answers_to_questions)
         self.question.show()
-        # answers_to_questions
-        while True:
-            if self.question.check_value is not None:
-                self.answers_to_questions()
-                break
-
-            qApp.processEvents()  # Starting the cycle rotation
-
-    def answers_to_questions(self):
-        while True:
-            if self.question.check_value == 'Yes':
-                self.question.rbtn_1.setText('Create file')
-                self.question.rbtn_2.setText('Select file')
-                self.question.group_box.setTitle('Do you want to create or select a file?')
-                self.question.label.setText('<center>The file extension must be .txt or .doc</center>')
-
-            elif self.question.check_value in ('No', 'Create file', 'Select file'):
 
+    @QtCore.pyqtSlot(str)
+    def answers_to_questions(self, answer):
+        if answer == 'Yes':
+            self.question.rbtn_1.setText('Create file')
+            self.question.rbtn_2.setText('Select file')
+            self.question.group_box.setTitle('Do you want to create or select a file?')
+            self.question.label.setText('<center>The file extension must be .txt or .doc</center>')
+            return
+
+        if answer == 'Create file':
+            self.path_file = QFileDialog.getSaveFileName(filter="*.doc *.txt")[0]
+            if self.path_file and not (self.path_file.endswith('.doc') or self.path_file.endswith('.txt')):
+                self.name_file = NamedFile()  # the name of the created file comes with the entered signal
+                self.name_file.entered.connect(self.named_file_entered)
                 self.question.close()
-
-                if self.question.check_value == 'Create file':
-                    self.path_file = QFileDialog.getSaveFileName(filter="*.doc *.txt")[0]
-                    if not (self.path_file.endswith('.doc') or self.path_file.endswith('.txt')):
-                        separator = '/'
-
-                        path = self.path_file.split(separator)[:-1]
-                        path = separator.join(path)
-
-                        name_file = NamedFile()
-                        # a loop is created to get the name of the created file
-                        while True:
-                            if name_file.valid_file_name:
-                                self.path_file = f'{path}{separator}{name_file.valid_file_name}.doc'
-                                break
-
-                            qApp.processEvents()  # Starting the cycle rotation
-
-                elif self.question.check_value == 'Select file':
-                    self.path_file = QFileDialog.getOpenFileName(filter="Files (*.doc *.txt)")[0]
-
-                self.show()  # display time manager window
-                break
-
-            qApp.processEvents()  # Starting the cycle rotation
+                return
+
+        elif answer == 'Select file':
+            self.path_file = QFileDialog.getOpenFileName(filter="Files (*.doc *.txt)")[0]
+
+        # the question is closed after the main window is shown, otherwise the application
+        # would quit because its last window was closed
+        self.start_work()
+        self.question.close()
+
+    @QtCore.pyqtSlot(str)
+    def named_file_entered(self, file_name):
+        separator = '/'
+        path = self.path_file.split(separator)[:-1]
+        path = separator.join(path)
+        self.path_file = f'{path}{separator}{file_name}.doc'
+        self.name_file = None
+        self.start_work()
+
+    def start_work(self):
+        self.open_journal()
+        self.show()  # display time manager window
 
 
 if __name__ == "__main__":